@@ -0,0 +1,7 @@
+'''
+benchmarks of the scheduler
+
+    python -m benchmark.generate --sizes 10 1000 100000   # seeded rosters in benchmark/data
+    python -m benchmark.run --sizes 10 1000               # per-phase timings, saved as json in benchmark/results
+    python -m benchmark.cpp --binary build/manage_employee_schedule
+'''
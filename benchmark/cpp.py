@@ -0,0 +1,103 @@
+'''
+time the C++ scheduler (manage_employee_schedule.cpp) on the same rosters as the python one
+
+    cmake -S . -B build && cmake --build build
+    python -m benchmark.cpp --binary build/manage_employee_schedule --sizes 10 1000
+
+the 10 employee run of input/preference_schedule.yaml is compared with output/schedule_cpp.yaml
+'''
+from typing import List, Set, Tuple
+import argparse
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import yaml
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from manage_employee_schedule import ManageSchedule
+from schedule_codes import parseDay, parseShift
+from benchmark.generate import ensureRoster
+from benchmark.run import DATA_DIR, RESULTS_DIR, saveResults
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+REFERENCE_INPUT = os.path.join(ROOT, 'input', 'preference_schedule.yaml')
+REFERENCE_OUTPUT = os.path.join(ROOT, 'output', 'schedule_cpp.yaml')
+
+
+def readAssignments(filename: str) -> Set[Tuple[str, int, int]]:
+    '''
+    return {(NAME, dayCode, shiftCode), ...} of a python or C++ schedule file
+
+    python schedules hold [day, shift] lists, C++ schedules {day: , shift: } maps
+    '''
+    with open(filename) as file:
+        schedule = yaml.safe_load(file) or {}
+    assignments = set()
+    for name, slots in schedule.items():
+        for slot in slots:
+            day, shift = (slot['day'], slot['shift']) if isinstance(slot, dict) else slot
+            assignments.add((str(name).upper(), parseDay(day), parseShift(shift)))
+    return assignments
+
+def compareSchedules(left: Set[Tuple[str, int, int]], right: Set[Tuple[str, int, int]]) -> dict:
+    '''
+    return the number of assignments in both schedules and in only one of them
+    '''
+    return {'both': len(left & right), 'onlyLeft': len(left - right), 'onlyRight': len(right - left)}
+
+def timeCpp(binary: str, filename: str, output: str) -> float:
+    '''
+    run the C++ scheduler on the roster, return the wall time in seconds
+    '''
+    start = time.perf_counter()
+    subprocess.run([binary, filename, output], stdout=subprocess.DEVNULL, check=True)
+    return time.perf_counter() - start
+
+def timePython(filename: str, output: str, seed: int = 0) -> float:
+    '''
+    run the python scheduler on the roster, return the wall time in seconds
+    '''
+    start = time.perf_counter()
+    schedule = ManageSchedule()
+    schedule.getPreference(filename)
+    schedule.assignShift(maxWorkDay=5, seed=seed)
+    schedule.writeOutput(output)
+    return time.perf_counter() - start
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(description='compare the C++ and python schedulers')
+    parser.add_argument('--binary', default=os.path.join(ROOT, 'build', 'manage_employee_schedule'))
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 1000])
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--contention', type=float, default=0.3)
+    parser.add_argument('--data-dir', default=DATA_DIR)
+    parser.add_argument('--results-dir', default=RESULTS_DIR)
+    arguments = parser.parse_args(argv)
+    logging.disable(logging.INFO)
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        cppOutput = os.path.join(directory, 'schedule_cpp.yaml')
+        pythonOutput = os.path.join(directory, 'schedule.yaml')
+
+        timeCpp(arguments.binary, REFERENCE_INPUT, cppOutput)
+        reference = compareSchedules(readAssignments(cppOutput), readAssignments(REFERENCE_OUTPUT))
+        print(f'reference input: {reference}')
+
+        for size in arguments.sizes:
+            filename = ensureRoster(arguments.data_dir, size, arguments.seed, arguments.contention)
+            cppSeconds = timeCpp(arguments.binary, filename, cppOutput)
+            pythonSeconds = timePython(filename, pythonOutput, arguments.seed)
+            comparison = compareSchedules(readAssignments(pythonOutput), readAssignments(cppOutput))
+            results.append({'employees': size, 'cpp': cppSeconds, 'python': pythonSeconds, 'assignments': comparison})
+            print(f'{size:>9} cpp {cppSeconds * 1000:10.2f} ms  python {pythonSeconds * 1000:10.2f} ms  {comparison}')
+
+    print(saveResults(results, arguments.results_dir, 'cpp', reference=reference,
+                      sizes=arguments.sizes, seed=arguments.seed, contention=arguments.contention))
+
+
+if __name__ == '__main__':
+    main()
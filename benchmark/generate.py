@@ -0,0 +1,79 @@
+'''
+seeded synthetic preference rosters
+'''
+from typing import Iterator, List
+import argparse
+import os
+import random
+
+SIZES = (10, 1000, 100000, 1000000)
+DAYS = ('Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun')
+WEEKDAYS = DAYS[:5]
+SHIFTS = ('morning', 'afternoon', 'evening')
+# the popular shift asked for by contended preferences, on a weekday
+POPULAR_SHIFT = 'morning'
+
+
+def generateRoster(numEmployees: int, seed: int = 0, contention: float = 0.3, maxWorkDay: int = 5) -> Iterator[dict]:
+    '''
+    yield employee entries in the format of input/preference_schedule.yaml
+
+    every employee prefers 1 to maxWorkDay different days; with probability contention a preference
+    is the popular weekday morning, otherwise a uniform random shift. The same arguments always
+    give the same roster
+    '''
+    rng = random.Random(seed)
+    for index in range(numEmployees):
+        preferences = []
+        days = set()
+        for _ in range(rng.randint(1, maxWorkDay)):
+            if rng.random() < contention:
+                choices, shift = WEEKDAYS, POPULAR_SHIFT
+            else:
+                choices, shift = DAYS, rng.choice(SHIFTS)
+            day = rng.choice(choices)
+            if day in days:
+                continue
+            days.add(day)
+            preferences.append({'day': day, 'time': shift})
+        yield {'name': f'Employee{index:07d}', 'preferences': preferences}
+
+def writeRoster(filename: str, numEmployees: int, seed: int = 0, contention: float = 0.3, maxWorkDay: int = 5) -> None:
+    '''
+    write a generated roster as yaml, one employee at a time
+    '''
+    with open(filename, 'w') as file:
+        file.write('employees:\n')
+        for employee in generateRoster(numEmployees, seed, contention, maxWorkDay):
+            lines = [f'  - name: {employee["name"]}\n', '    preferences:\n']
+            for slot in employee['preferences']:
+                lines.append(f'      - day: {slot["day"]}\n        time: {slot["time"]}\n')
+            file.write(''.join(lines))
+
+def rosterFilename(directory: str, numEmployees: int, seed: int, contention: float) -> str:
+    return os.path.join(directory, f'roster_{numEmployees}_seed{seed}_contention{contention:g}.yaml')
+
+def ensureRoster(directory: str, numEmployees: int, seed: int = 0, contention: float = 0.3) -> str:
+    '''
+    return the roster file of the arguments, generating it the first time
+    '''
+    os.makedirs(directory, exist_ok=True)
+    filename = rosterFilename(directory, numEmployees, seed, contention)
+    if not os.path.exists(filename):
+        writeRoster(filename + '.tmp', numEmployees, seed, contention)
+        os.replace(filename + '.tmp', filename)
+    return filename
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(description='generate seeded preference rosters')
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(SIZES))
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--contention', type=float, default=0.3, help='share of preferences for the popular weekday morning')
+    parser.add_argument('--output-dir', default=os.path.join(os.path.dirname(__file__), 'data'))
+    arguments = parser.parse_args(argv)
+    for size in arguments.sizes:
+        print(ensureRoster(arguments.output_dir, size, arguments.seed, arguments.contention))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+'''
+time each phase of the scheduler on generated rosters and save the timings as json
+'''
+from typing import List
+import argparse
+import datetime
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from manage_employee_schedule import ManageSchedule
+from benchmark.generate import SIZES, ensureRoster
+
+PHASES = ('load', 'validate', 'assign', 'fill', 'write')
+DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), 'results')
+
+
+def timePhases(filename: str, maxWorkDay: int = 5, seed: int = 0, outputFormat: str = 'yaml') -> dict:
+    '''
+    run the scheduler on the roster once, return the seconds of each of PHASES
+    '''
+    timings = {}
+    schedule = ManageSchedule()
+    with tempfile.TemporaryDirectory() as directory:
+        steps = (
+            ('load', lambda: schedule.getPreference(filename)),
+            ('validate', lambda: schedule.checkPreferences(maxWorkDay)),
+            ('assign', lambda: schedule.assignPreferences(maxWorkDay)),
+            ('fill', lambda: schedule.fillUnderStaffedÍhifts(maxWorkDay, seed)),
+            ('write', lambda: schedule.writeOutput(os.path.join(directory, 'schedule'), outputFormat)),
+        )
+        for phase, step in steps:
+            start = time.perf_counter()
+            step()
+            timings[phase] = time.perf_counter() - start
+    return timings
+
+def benchmark(sizes: List[int], repeat: int = 3, seed: int = 0, contention: float = 0.3,
+              dataDir: str = DATA_DIR, outputFormat: str = 'yaml') -> List[dict]:
+    '''
+    return [{'employees', 'phase', 'best', 'runs'}, ...], the best of repeat runs per size and phase
+    '''
+    results = []
+    for size in sizes:
+        filename = ensureRoster(dataDir, size, seed, contention)
+        runs = [timePhases(filename, seed=seed, outputFormat=outputFormat) for _ in range(repeat)]
+        for phase in PHASES:
+            seconds = [run[phase] for run in runs]
+            results.append({'employees': size, 'phase': phase, 'best': min(seconds), 'runs': seconds})
+    return results
+
+def environment() -> dict:
+    '''
+    return the python, platform and git commit of this run
+    '''
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(__file__), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'commit': commit,
+    }
+
+def saveResults(results: List[dict], directory: str = RESULTS_DIR, name: str = 'phases', **parameters) -> str:
+    '''
+    write the results with the environment to <directory>/<name>_<utc timestamp>.json, return the filename
+    '''
+    now = datetime.datetime.now(datetime.timezone.utc)
+    os.makedirs(directory, exist_ok=True)
+    filename = os.path.join(directory, f'{name}_{now.strftime("%Y%m%dT%H%M%S.%fZ")}.json')
+    with open(filename, 'w') as file:
+        json.dump({'benchmark': name, 'timestamp': now.isoformat(), 'environment': environment(), 'parameters': parameters,
+                   'results': results}, file, indent=2)
+        file.write('\n')
+    return filename
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(description='time each phase of the scheduler')
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(SIZES[:3]))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--contention', type=float, default=0.3)
+    parser.add_argument('--format', default='yaml', help='output format of the write phase')
+    parser.add_argument('--data-dir', default=DATA_DIR)
+    parser.add_argument('--results-dir', default=RESULTS_DIR)
+    arguments = parser.parse_args(argv)
+    logging.disable(logging.INFO)
+
+    results = benchmark(arguments.sizes, arguments.repeat, arguments.seed, arguments.contention,
+                        arguments.data_dir, arguments.format)
+    for result in results:
+        print(f'{result["employees"]:>9} {result["phase"]:<9} {result["best"] * 1000:10.2f} ms')
+    print(saveResults(results, arguments.results_dir, sizes=arguments.sizes, repeat=arguments.repeat,
+                      seed=arguments.seed, contention=arguments.contention, format=arguments.format))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,297 @@
+'''
+schedule several weeks of real calendar dates
+
+    python horizon_schedule.py input/preference_schedule.yaml --start 2026-11-02 --weeks 13 \
+        --output output/horizon.jsonl
+
+weekly preferences (the day and shift of the preference file) apply to the matching weekday of
+every week. The horizon is processed one 7-day block at a time and every block is written as one
+json line as soon as it is scheduled, so memory stays the same for 4 or 52 weeks.
+'''
+from array import array
+from datetime import date, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple, TextIO
+import argparse
+import heapq
+import json
+import logging
+import random
+import sys
+from manage_employee_schedule import ManageSchedule
+from schedule_codes import NUM_DAYS, NUM_SHIFTS, SHIFT_CAPACITY, SHIFT_NAMES, parseCapacity
+
+logger = logging.getLogger(__name__)
+
+# 7-day blocks from the start date, the weekly limit applies per block
+WEEK_DAYS = 7
+
+
+class HorizonSchedule:
+    '''
+    greedy preference pass and least-loaded fill over numDays dates from start, one 7-day block at a time
+
+    dates are indexes from start (date index) and slots are date index * NUM_SHIFTS + shift code.
+    occupancy and capacity of the whole horizon are flat arrays of slots; every employee keeps the bitmasks
+    of worked slots and worked dates, relative to the date index base, for the dates still needed by the rules:
+
+    maxWorkDay: shifts per 7-day block
+    maxWindowDays: worked dates in any windowDays consecutive dates (None: no limit)
+    maxConsecutiveDays: consecutive worked dates (None: no limit)
+    minShiftGap: minimum distance in slots between two worked shifts, 2 forbids an evening followed by the next morning
+
+    the rules hold across block boundaries
+    '''
+    def __init__(self, preferenceCodes: Dict[str, List[Tuple[int, int]]], start: date, numDays: int,
+                 capacity=SHIFT_CAPACITY, maxWorkDay: int = 5, maxWindowDays: Optional[int] = None,
+                 windowDays: int = 14, maxConsecutiveDays: Optional[int] = 6, minShiftGap: int = 2,
+                 seed: Optional[int] = None):
+        if numDays < 0 or windowDays < 1 or minShiftGap < 1:
+            raise ValueError('numDays must not be negative, windowDays and minShiftGap must be positive')
+        self.names = list(preferenceCodes)
+        self.preferenceCodes = preferenceCodes
+        self.start = start
+        self.numDays = numDays
+        self.maxWorkDay = maxWorkDay
+        self.maxWindowDays = maxWindowDays
+        self.windowDays = windowDays
+        self.maxConsecutiveDays = maxConsecutiveDays
+        self.minShiftGap = minShiftGap
+        self.rng = random.Random(seed)
+
+        table = parseCapacity(capacity)
+        weekday = start.weekday()
+        self.capacity = array('H', [table[(weekday + index) % NUM_DAYS][shift]
+                                    for index in range(numDays) for shift in range(NUM_SHIFTS)])
+        self.occupancy = array('H', bytes(2 * numDays * NUM_SHIFTS))
+
+        # dates kept before the current block for the rules
+        self.memory = max(windowDays - 1 if maxWindowDays is not None else 0, maxConsecutiveDays or 0,
+                          -(-minShiftGap // NUM_SHIFTS))
+        self.base = -self.memory # date index of bit 0 of workedDays and of bits 0..NUM_SHIFTS-1 of workedSlots
+        numEmployees = len(self.names)
+        self.workedSlots = [0] * numEmployees
+        self.workedDays = [0] * numEmployees
+        self.weekLoad = array('H', bytes(2 * numEmployees))
+        self.totalLoad = array('I', bytes(4 * numEmployees))
+
+    def setDateCapacity(self, day: date, shift: int, capacity: int) -> None:
+        '''
+        override the capacity of one shift of a date, e.g. for a holiday
+        '''
+        index = (day - self.start).days
+        if not 0 <= index < self.numDays or capacity < 0:
+            raise ValueError(f'invalid date capacity: {day} {shift} {capacity}')
+        self.capacity[index * NUM_SHIFTS + shift] = capacity
+
+    def canWork(self, employee: int, index: int, shift: int) -> bool:
+        '''
+        return true if the employee can take the shift of the date index without breaking a rule
+        '''
+        if self.occupancy[index * NUM_SHIFTS + shift] >= self.capacity[index * NUM_SHIFTS + shift]:
+            return False
+        if self.weekLoad[employee] >= self.maxWorkDay:
+            return False
+        day = index - self.base
+        days = self.workedDays[employee]
+        if days >> day & 1:
+            return False
+
+        # no other shift closer than minShiftGap slots
+        gap = self.minShiftGap - 1
+        slot = day * NUM_SHIFTS + shift
+        low = max(slot - gap, 0)
+        if gap and self.workedSlots[employee] >> low & ((1 << (slot + gap + 1 - low)) - 1):
+            return False
+
+        if self.maxConsecutiveDays is not None:
+            run = 1
+            before = day - 1
+            while before >= 0 and days >> before & 1 and run <= self.maxConsecutiveDays:
+                run += 1
+                before -= 1
+            after = day + 1
+            while days >> after & 1 and run <= self.maxConsecutiveDays:
+                run += 1
+                after += 1
+            if run > self.maxConsecutiveDays:
+                return False
+
+        if self.maxWindowDays is not None:
+            window = self.windowDays
+            first = max(day - window + 1, 0)
+            # every window holding the date is inside [first, day + window)
+            if bin(days >> first & ((1 << (day + window - first)) - 1)).count('1') >= self.maxWindowDays:
+                for windowStart in range(first, day + 1):
+                    if bin(days >> windowStart & ((1 << window) - 1)).count('1') >= self.maxWindowDays:
+                        return False
+        return True
+
+    def assign(self, employee: int, index: int, shift: int) -> None:
+        day = index - self.base
+        self.workedSlots[employee] |= 1 << (day * NUM_SHIFTS + shift)
+        self.workedDays[employee] |= 1 << day
+        self.weekLoad[employee] += 1
+        self.totalLoad[employee] += 1
+        self.occupancy[index * NUM_SHIFTS + shift] += 1
+
+    def iterWeeks(self) -> Iterator[dict]:
+        '''
+        schedule and yield one 7-day block at a time as
+        {'week', 'start', 'days', 'schedule': {name: [(date, shift), ...]}, 'satisfied', 'preferences', 'unfilledSlots'}
+        '''
+        for weekStart in range(0, self.numDays, WEEK_DAYS):
+            weekEnd = min(weekStart + WEEK_DAYS, self.numDays)
+            assigned = [[] for _ in self.names]
+            satisfied, preferences = self.assignPreferences(weekStart, weekEnd, assigned)
+            self.fill(weekStart, weekEnd, assigned)
+            yield self.weekResult(weekStart, weekEnd, assigned, satisfied, preferences)
+            self.slide(weekEnd)
+
+    def assignPreferences(self, weekStart: int, weekEnd: int, assigned: List[list]) -> Tuple[int, int]:
+        '''
+        greedy pass over the preferences in insertion order for the dates of the block
+
+        a preferred shift that cannot be taken falls back to the other shifts of the date and then to
+        the following dates of the block, wrapping around it like findOpenSlot.
+        return (satisfied preferences, preferences falling in the block)
+        '''
+        startWeekday = self.start.weekday()
+        length = weekEnd - weekStart
+        satisfied = preferences = 0
+        for employee, name in enumerate(self.names):
+            for weekday, shift in self.preferenceCodes[name]:
+                offset = (weekday - startWeekday - weekStart) % NUM_DAYS
+                if offset >= length:
+                    continue
+                preferences += 1
+                if self.weekLoad[employee] >= self.maxWorkDay:
+                    continue
+                index = weekStart + offset
+                if self.canWork(employee, index, shift):
+                    self.assign(employee, index, shift)
+                    assigned[employee].append((index, shift))
+                    satisfied += 1
+                    continue
+                slot = self.findSlot(employee, weekStart, length, offset, shift)
+                if slot is not None:
+                    self.assign(employee, *slot)
+                    assigned[employee].append(slot)
+        return satisfied, preferences
+
+    def findSlot(self, employee: int, weekStart: int, length: int, offset: int, shift: int) -> Optional[Tuple[int, int]]:
+        '''
+        return the first (date index, shift) the employee can take from the offset in the block on
+        '''
+        for step in range(length):
+            index = weekStart + (offset + step) % length
+            for other in range(NUM_SHIFTS):
+                if (step or other != shift) and self.canWork(employee, index, other):
+                    return index, other
+        return None
+
+    def fill(self, weekStart: int, weekEnd: int, assigned: List[list]) -> None:
+        '''
+        fill the under staffed shifts of the block in date order with the least loaded employees
+
+        employees wait in a heap of (shifts this block, shifts so far, random tie break, employee); an employee
+        a rule keeps from a shift is set aside until the next shift
+        '''
+        rng = self.rng
+        available = [(self.weekLoad[employee], self.totalLoad[employee], rng.random(), employee)
+                     for employee in range(len(self.names)) if self.weekLoad[employee] < self.maxWorkDay]
+        heapq.heapify(available)
+        for index in range(weekStart, weekEnd):
+            for shift in range(NUM_SHIFTS):
+                slot = index * NUM_SHIFTS + shift
+                setAside = []
+                while self.occupancy[slot] < self.capacity[slot] and available:
+                    entry = heapq.heappop(available)
+                    employee = entry[3]
+                    if not self.canWork(employee, index, shift):
+                        setAside.append(entry)
+                        continue
+                    self.assign(employee, index, shift)
+                    assigned[employee].append((index, shift))
+                    if self.weekLoad[employee] < self.maxWorkDay:
+                        heapq.heappush(available, (self.weekLoad[employee], self.totalLoad[employee], rng.random(), employee))
+                for entry in setAside:
+                    heapq.heappush(available, entry)
+
+    def weekResult(self, weekStart: int, weekEnd: int, assigned: List[list], satisfied: int, preferences: int) -> dict:
+        schedule = {}
+        for employee, slots in enumerate(assigned):
+            if slots:
+                schedule[self.names[employee]] = [((self.start + timedelta(days=index)).isoformat(), SHIFT_NAMES[shift])
+                                                  for index, shift in sorted(slots)]
+        first, last = weekStart * NUM_SHIFTS, weekEnd * NUM_SHIFTS
+        return {
+            'week': weekStart // WEEK_DAYS,
+            'start': (self.start + timedelta(days=weekStart)).isoformat(),
+            'days': weekEnd - weekStart,
+            'schedule': schedule,
+            'satisfied': satisfied,
+            'preferences': preferences,
+            'unfilledSlots': sum(max(self.capacity[slot] - self.occupancy[slot], 0) for slot in range(first, last)),
+        }
+
+    def slide(self, weekEnd: int) -> None:
+        '''
+        start the next block: reset the block loads and drop the dates the rules no longer need
+        '''
+        self.weekLoad = array('H', bytes(2 * len(self.names)))
+        base = weekEnd - self.memory
+        shift = base - self.base
+        if shift > 0:
+            self.workedDays = [days >> shift for days in self.workedDays]
+            self.workedSlots = [slots >> (shift * NUM_SHIFTS) for slots in self.workedSlots]
+            self.base = base
+
+
+def writeWeeks(weeks: Iterator[dict], file: TextIO) -> int:
+    '''
+    write every block of iterWeeks as one json line as soon as it is scheduled, return the number of blocks
+    '''
+    count = 0
+    for week in weeks:
+        file.write(json.dumps(week))
+        file.write('\n')
+        count += 1
+    return count
+
+def parseArguments(argv: List[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='schedule several weeks of calendar dates')
+    parser.add_argument('input', help='preference file')
+    parser.add_argument('--start', type=date.fromisoformat, default=None, help='first date, YYYY-MM-DD (default: next monday)')
+    parser.add_argument('--weeks', type=int, default=4, help='number of weeks (default: 4)')
+    parser.add_argument('--output', default='output/horizon.jsonl', help='json lines file, one line per week')
+    parser.add_argument('--capacity', type=json.loads, default=SHIFT_CAPACITY, help='capacity as json, see parseCapacity')
+    parser.add_argument('--max-work-day', type=int, default=5, help='maximum shifts per week (default: 5)')
+    parser.add_argument('--max-window-days', type=int, default=None, help='maximum worked days in any --window-days days')
+    parser.add_argument('--window-days', type=int, default=14)
+    parser.add_argument('--max-consecutive-days', type=int, default=6)
+    parser.add_argument('--min-shift-gap', type=int, default=2, help='2 forbids an evening followed by the next morning')
+    parser.add_argument('--seed', type=int, default=0)
+    return parser.parse_args(argv)
+
+def main(argv: List[str] = None) -> int:
+    arguments = parseArguments(argv)
+    logging.basicConfig(level=logging.WARNING)
+    start = arguments.start
+    if start is None:
+        today = date.today()
+        start = today + timedelta(days=NUM_DAYS - today.weekday())
+
+    roster = ManageSchedule()
+    roster.getPreference(arguments.input)
+    roster.validatePreferences(arguments.max_work_day)
+    horizon = HorizonSchedule(roster.preferenceCodes, start, arguments.weeks * WEEK_DAYS, arguments.capacity,
+                              arguments.max_work_day, arguments.max_window_days, arguments.window_days,
+                              arguments.max_consecutive_days, arguments.min_shift_gap, arguments.seed)
+    with open(arguments.output, 'w') as file:
+        weeks = writeWeeks(horizon.iterWeeks(), file)
+    logger.info('wrote %d weeks to %s', weeks, arguments.output)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
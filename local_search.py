@@ -0,0 +1,265 @@
+from typing import Dict, List, Optional, Tuple
+import math
+import random
+import time
+from schedule_codes import NUM_DAYS, NUM_SHIFTS, SHIFT_CAPACITY, parseCapacity
+
+# score = COVERAGE_WEIGHT * assigned shifts + PREFERENCE_WEIGHT * preferred shifts - BALANCE_WEIGHT * sum of squared loads,
+# coverage outweighs the balance cost of one more shift for any maxWorkDay of a week
+COVERAGE_WEIGHT = 100
+PREFERENCE_WEIGHT = 10
+BALANCE_WEIGHT = 1
+
+NUM_SLOTS = NUM_DAYS * NUM_SHIFTS
+# moves accepted since the best schedule before the search goes back to it
+MAX_UNDO = 10000
+# iterations between two clock reads
+CLOCK_INTERVAL = 64
+
+
+class LocalSearch:
+    '''
+    swap and move local search over a week schedule, see improveAssignment
+
+    employees are indexes into names and slots are day code * NUM_SHIFTS + shift code; every employee keeps
+    the bitmasks of its preferred slots, held slots and worked days, so the score delta of a move is a few
+    bit tests and the loads of at most two employees
+    '''
+    def __init__(self, schedule: Dict[str, List[Tuple[int, int]]], preferenceCodes: Dict[str, List[Tuple[int, int]]],
+                 maxWorkDay: int, capacity=SHIFT_CAPACITY, seed: Optional[int] = None):
+        self.names = list(preferenceCodes) + [name for name in schedule if name not in preferenceCodes]
+        self.maxWorkDay = maxWorkDay
+        self.capacity = [count for row in parseCapacity(capacity) for count in row] # per slot
+        self.rng = random.Random(seed)
+
+        numEmployees = len(self.names)
+        self.preferred = [0] * numEmployees # bitmask of preferred slots
+        self.heldSlots = [0] * numEmployees # bitmask of held slots
+        self.workDays = [0] * numEmployees # bitmask of worked day codes
+        self.held = [[] for _ in range(numEmployees)] # [slot, ...] in schedule order
+        self.roster = [[] for _ in range(NUM_SLOTS)] # [employee, ...] per slot
+        for employee, name in enumerate(self.names):
+            for day, shift in preferenceCodes.get(name, ()):
+                self.preferred[employee] |= 1 << (day * NUM_SHIFTS + shift)
+            for day, shift in schedule.get(name, ()):
+                self.assign(employee, day * NUM_SHIFTS + shift)
+        self.withPreferences = [employee for employee in range(numEmployees) if self.preferred[employee]]
+        self.score = self.computeScore()
+
+    def computeScore(self) -> int:
+        '''
+        return the score of the current schedule from scratch
+        '''
+        score = 0
+        for employee, held in enumerate(self.held):
+            hits = bin(self.heldSlots[employee] & self.preferred[employee]).count('1')
+            score += COVERAGE_WEIGHT * len(held) + PREFERENCE_WEIGHT * hits - BALANCE_WEIGHT * len(held) ** 2
+        return score
+
+    def assign(self, employee: int, slot: int) -> None:
+        self.held[employee].append(slot)
+        self.heldSlots[employee] |= 1 << slot
+        self.workDays[employee] |= 1 << (slot // NUM_SHIFTS)
+        self.roster[slot].append(employee)
+
+    def unassign(self, employee: int, slot: int) -> None:
+        self.held[employee].remove(slot)
+        self.heldSlots[employee] &= ~(1 << slot)
+        self.workDays[employee] &= ~(1 << (slot // NUM_SHIFTS))
+        self.roster[slot].remove(employee)
+
+    def apply(self, moves: list) -> None:
+        '''
+        apply [(employee, slot, +1 or -1), ...] in order
+        '''
+        for employee, slot, change in moves:
+            if change > 0:
+                self.assign(employee, slot)
+            else:
+                self.unassign(employee, slot)
+
+    def revert(self, moves: list) -> None:
+        '''
+        undo moves applied by apply
+        '''
+        for employee, slot, change in reversed(moves):
+            if change > 0:
+                self.unassign(employee, slot)
+            else:
+                self.assign(employee, slot)
+
+    def isFree(self, employee: int, slot: int, released: int = -1) -> bool:
+        '''
+        return true if the employee can take the slot once the released slot is given up
+        '''
+        day = slot // NUM_SHIFTS
+        return not self.workDays[employee] >> day & 1 or released // NUM_SHIFTS == day
+
+    def proposeMove(self, employee: int, source: int, target: int):
+        '''
+        return (delta, moves) of moving the employee from the source slot to the target slot, None if not allowed
+        '''
+        if (self.heldSlots[employee] >> target & 1 or len(self.roster[target]) >= self.capacity[target]
+                or not self.isFree(employee, target, source)):
+            return None
+        preferred = self.preferred[employee]
+        delta = PREFERENCE_WEIGHT * ((preferred >> target & 1) - (preferred >> source & 1))
+        return delta, [(employee, source, -1), (employee, target, 1)]
+
+    def proposeSwap(self, employee: int, source: int, other: int, target: int):
+        '''
+        return (delta, moves) of the employee at the source slot and the other employee at the target slot
+        trading slots, None if not allowed
+        '''
+        if (employee == other or source == target or self.heldSlots[employee] >> target & 1
+                or self.heldSlots[other] >> source & 1 or not self.isFree(employee, target, source)
+                or not self.isFree(other, source, target)):
+            return None
+        preferred, otherPreferred = self.preferred[employee], self.preferred[other]
+        delta = PREFERENCE_WEIGHT * ((preferred >> target & 1) - (preferred >> source & 1)
+                                     + (otherPreferred >> source & 1) - (otherPreferred >> target & 1))
+        return delta, [(employee, source, -1), (other, target, -1), (employee, target, 1), (other, source, 1)]
+
+    def proposeAdd(self, employee: int, target: int):
+        '''
+        return (delta, moves) of giving the employee the open target slot, None if not allowed
+        '''
+        load = len(self.held[employee])
+        if load >= self.maxWorkDay or len(self.roster[target]) >= self.capacity[target] or not self.isFree(employee, target):
+            return None
+        delta = (COVERAGE_WEIGHT + PREFERENCE_WEIGHT * (self.preferred[employee] >> target & 1)
+                 - BALANCE_WEIGHT * (2 * load + 1))
+        return delta, [(employee, target, 1)]
+
+    def proposeTransfer(self, employee: int, source: int, other: int):
+        '''
+        return (delta, moves) of handing the source slot of the employee to the other employee, None if not allowed
+        '''
+        load, otherLoad = len(self.held[employee]), len(self.held[other])
+        if employee == other or otherLoad >= self.maxWorkDay or not self.isFree(other, source):
+            return None
+        delta = (PREFERENCE_WEIGHT * ((self.preferred[other] >> source & 1) - (self.preferred[employee] >> source & 1))
+                 - BALANCE_WEIGHT * 2 * (otherLoad - load + 1))
+        return delta, [(employee, source, -1), (other, source, 1)]
+
+    def proposePreferred(self):
+        '''
+        propose giving a random employee one of its preferred slots it does not hold, by a move,
+        an add or a swap with someone holding it
+        '''
+        rng = self.rng
+        employee = rng.choice(self.withPreferences)
+        missing = self.preferred[employee] & ~self.heldSlots[employee]
+        if not missing:
+            return None
+        slots = [slot for slot in range(NUM_SLOTS) if missing >> slot & 1]
+        target = rng.choice(slots)
+        held = self.held[employee]
+        day = target // NUM_SHIFTS
+        sameDay = [slot for slot in held if slot // NUM_SHIFTS == day]
+        source = sameDay[0] if sameDay else (rng.choice(held) if held else None)
+        if len(self.roster[target]) < self.capacity[target]:
+            if sameDay or held and len(held) >= self.maxWorkDay:
+                return self.proposeMove(employee, source, target)
+            return self.proposeAdd(employee, target)
+        if source is None or not self.roster[target]:
+            return None
+        return self.proposeSwap(employee, source, rng.choice(self.roster[target]), target)
+
+    def propose(self):
+        '''
+        return (delta, moves) of a random neighbour, None if the drawn move is not allowed
+        '''
+        rng = self.rng
+        kind = rng.random()
+        if kind < 0.5 and self.withPreferences:
+            return self.proposePreferred()
+        employee = rng.randrange(len(self.names))
+        held = self.held[employee]
+        if kind < 0.7:
+            return self.proposeAdd(employee, rng.randrange(NUM_SLOTS))
+        if not held:
+            return None
+        source = rng.choice(held)
+        if kind < 0.85:
+            return self.proposeTransfer(employee, source, rng.randrange(len(self.names)))
+        target = rng.randrange(NUM_SLOTS)
+        if len(self.roster[target]) < self.capacity[target]:
+            return self.proposeMove(employee, source, target)
+        if not self.roster[target]:
+            return None
+        return self.proposeSwap(employee, source, rng.choice(self.roster[target]), target)
+
+    def run(self, seconds: Optional[float] = None, iterations: Optional[int] = None) -> List[Tuple[int, float, int]]:
+        '''
+        anneal until one of the budgets is spent and finish on the best schedule found
+
+        worse moves are accepted with probability exp(delta / temperature), the temperature falls linearly
+        from PREFERENCE_WEIGHT to zero over the budget. return the trace [(iteration, seconds, best score), ...]
+        of the start and every improvement of the best score
+        '''
+        if seconds is None and iterations is None:
+            raise ValueError('local search needs a time or iteration budget')
+        rng = self.rng
+        start = time.perf_counter()
+        elapsed = 0.0
+        bestScore = self.score
+        trace = [(0, 0.0, bestScore)]
+        undo = [] # moves since the best schedule
+        iteration = 0
+        if not self.names:
+            return trace
+
+        while iterations is None or iteration < iterations:
+            if seconds is not None and iteration % CLOCK_INTERVAL == 0:
+                elapsed = time.perf_counter() - start
+                if elapsed >= seconds:
+                    break
+            progress = max(elapsed / seconds if seconds else 0.0, iteration / iterations if iterations else 0.0)
+            iteration += 1
+            proposal = self.propose()
+            if proposal is None:
+                continue
+            delta, moves = proposal
+            if delta < 0:
+                temperature = PREFERENCE_WEIGHT * (1.0 - progress)
+                if temperature <= 0 or rng.random() >= math.exp(delta / temperature):
+                    continue
+            self.apply(moves)
+            self.score += delta
+            undo.extend(moves)
+            if self.score > bestScore:
+                bestScore = self.score
+                undo.clear()
+                trace.append((iteration, time.perf_counter() - start, bestScore))
+            elif len(undo) > MAX_UNDO:
+                self.revert(undo)
+                self.score = bestScore
+                undo.clear()
+        self.revert(undo)
+        self.score = bestScore
+        return trace
+
+    def toSchedule(self) -> Dict[str, List[Tuple[int, int]]]:
+        '''
+        return {name: [(day, shift), ...]} of the employees with at least one shift
+        '''
+        return {self.names[employee]: [divmod(slot, NUM_SHIFTS) for slot in held]
+                for employee, held in enumerate(self.held) if held}
+
+
+def improveAssignment(schedule: Dict[str, List[Tuple[int, int]]], preferenceCodes: Dict[str, List[Tuple[int, int]]],
+                      maxWorkDay: int = 5, capacity=SHIFT_CAPACITY, seconds: Optional[float] = None,
+                      iterations: Optional[int] = None, seed: Optional[int] = None
+                      ) -> Tuple[Dict[str, List[Tuple[int, int]]], List[Tuple[int, float, int]]]:
+    '''
+    improve a schedule {name: [(dayCode, shiftCode), ...]} by local search under a wall clock (seconds)
+    and/or iteration budget
+
+    the score rewards covered shifts, preferred shifts and even loads (see COVERAGE_WEIGHT),
+    one shift per day, maxWorkDay and capacity (an int or a table, see parseCapacity) are kept.
+    return (best schedule, score trace of LocalSearch.run), the best schedule is never worse than the input
+    '''
+    search = LocalSearch(schedule, preferenceCodes, maxWorkDay, capacity, seed)
+    trace = search.run(seconds, iterations)
+    return search.toSchedule(), trace
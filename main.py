@@ -0,0 +1,184 @@
+'''
+schedule many sites in parallel
+
+    python main.py input/ --output-dir output --workers 8
+    python main.py 'stores/*.yaml' regions.yaml --format json
+
+every preference file is one site, except yaml files with a top-level sites list
+(see preference_loader.iterSites) which hold one site per entry. Each site is written
+to <output-dir>/<site>.<format>. With the same --seed every site gets the same schedule
+as when it is run alone.
+'''
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+import argparse
+import glob
+import json
+import logging
+import os
+import re
+import sys
+import time
+from manage_employee_schedule import ManageSchedule, STRATEGIES
+from preference_cache import PreferenceCache
+from preference_loader import JSON_LINES_EXTENSIONS, findSection, iterSites
+from schedule_writer import FORMATS
+
+INPUT_EXTENSIONS = ('.yaml', '.yml') + JSON_LINES_EXTENSIONS
+OUTPUT_EXTENSIONS = {'yaml': '.yaml', 'json': '.json', 'jsonl': '.jsonl', 'binary': '.bin'}
+
+
+def scheduleSite(site: str, source, output: str, maxWorkDay: int = 5, strategy: str = 'greedy',
+                 seed: Optional[int] = None, format: str = 'yaml', stats: bool = False, strict: bool = False,
+                 cacheDir: Optional[str] = None, improveSeconds: Optional[float] = None) -> dict:
+    '''
+    schedule one site and write it to output, source is a preference file, a list of employee entries
+    or the exception raised while reading the site
+
+    return {'site', 'output', 'employees', 'seconds', 'error', 'stats'}, error is None on success
+    and stats is the ScheduleStats dict when stats is true. With strict, invalid preferences fail the site
+    instead of being dropped. With cacheDir, preference files are read through a PreferenceCache there,
+    with improveSeconds the schedule is improved by local search for that long
+    '''
+    start = time.perf_counter()
+    result = {'site': site, 'output': output, 'employees': 0, 'seconds': 0.0, 'error': None, 'stats': None}
+    try:
+        schedule = ManageSchedule(site, stats=stats)
+        if isinstance(source, Exception):
+            raise source
+        if isinstance(source, str):
+            schedule.getPreference(source, PreferenceCache(cacheDir) if cacheDir else None)
+        else:
+            schedule.loadEmployees(source)
+        schedule.assignShift(maxWorkDay=maxWorkDay, strategy=strategy, seed=seed, strict=strict,
+                             improveSeconds=improveSeconds)
+        schedule.writeOutput(output, format)
+        result['employees'] = len(schedule.preferences)
+        if stats:
+            result['stats'] = schedule.stats.toDict()
+    except Exception as error:
+        result['error'] = f'{type(error).__name__}: {error}'
+    result['seconds'] = time.perf_counter() - start
+    return result
+
+def findInputs(patterns: List[str]) -> List[str]:
+    '''
+    return the preference files of files, directories and glob patterns, in order and without duplicates
+    '''
+    files = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            matches = sorted(os.path.join(pattern, name) for name in os.listdir(pattern)
+                             if name.endswith(INPUT_EXTENSIONS))
+        else:
+            matches = sorted(glob.glob(pattern)) or [pattern]
+        for match in matches:
+            if match not in files:
+                files.append(match)
+    return files
+
+def siteFilename(site: str) -> str:
+    '''
+    return a file name for the site name
+    '''
+    return re.sub(r'[^A-Za-z0-9_.-]+', '_', site).strip('._') or 'site'
+
+def iterJobs(inputs: List[str]):
+    '''
+    yield (site, source) for every site of the input files, see scheduleSite
+
+    multi-site files are read here one site at a time, single-site files are read by the worker
+    '''
+    for filename in inputs:
+        site = os.path.splitext(os.path.basename(filename))[0]
+        if filename.endswith(JSON_LINES_EXTENSIONS):
+            yield site, filename
+            continue
+        try:
+            section = findSection(filename)
+        except Exception as error:
+            # reported by scheduleSite like any other failure of the site
+            yield site, error
+            continue
+        if section != 'sites':
+            yield site, filename
+            continue
+        # a bad site is yielded as (file#position, error) by iterSites
+        yield from iterSites(filename)
+
+def runBatch(inputs: List[str], outputDir: str, workers: int = None, maxWorkDay: int = 5,
+             strategy: str = 'greedy', seed: Optional[int] = 0, format: str = 'yaml', stats: bool = False,
+             strict: bool = False, cacheDir: Optional[str] = None, improveSeconds: Optional[float] = None) -> List[dict]:
+    '''
+    schedule every site of the input files on a process pool, return the results of scheduleSite in input order
+    '''
+    os.makedirs(outputDir, exist_ok=True)
+    extension = OUTPUT_EXTENSIONS[format]
+    outputs = set()
+
+    def outputFor(site: str) -> str:
+        base = siteFilename(site)
+        output = os.path.join(outputDir, base + extension)
+        suffix = 1
+        while output in outputs:
+            suffix += 1
+            output = os.path.join(outputDir, f'{base}_{suffix}{extension}')
+        outputs.add(output)
+        return output
+
+    options = (maxWorkDay, strategy, seed, format, stats, strict, cacheDir, improveSeconds)
+    if workers is not None and workers <= 1:
+        return [scheduleSite(site, source, outputFor(site), *options) for site, source in iterJobs(inputs)]
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(scheduleSite, site, source, outputFor(site), *options)
+                   for site, source in iterJobs(inputs)]
+        return [future.result() for future in futures]
+
+def printSummary(results: List[dict], seconds: float, file=sys.stdout) -> None:
+    '''
+    print the throughput and the failed sites of a batch
+    '''
+    failed = [result for result in results if result['error']]
+    employees = sum(result['employees'] for result in results)
+    print(f'{len(results) - len(failed)}/{len(results)} sites scheduled, {employees} employees '
+          f'in {seconds:.2f}s ({len(results) / seconds if seconds else 0:.1f} sites/s, '
+          f'{employees / seconds if seconds else 0:.0f} employees/s)', file=file)
+    for result in failed:
+        print(f'FAILED {result["site"]}: {result["error"]}', file=file)
+
+def parseArguments(argv: List[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='schedule employees of many sites in parallel')
+    parser.add_argument('inputs', nargs='+', help='preference files, directories or glob patterns')
+    parser.add_argument('--output-dir', default='output', help='directory of the schedules (default: output)')
+    parser.add_argument('--workers', type=int, default=None, help='number of processes (default: number of cpus)')
+    parser.add_argument('--max-work-day', type=int, default=5, help='maximum shifts per employee (default: 5)')
+    parser.add_argument('--strategy', choices=STRATEGIES, default='greedy')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the under staffed fill (default: 0)')
+    parser.add_argument('--format', choices=FORMATS, default='yaml')
+    parser.add_argument('--strict', action='store_true', help='fail sites with invalid preferences instead of dropping them')
+    parser.add_argument('--stats', action='store_true', help='print per phase timings and counters of every site as json lines')
+    parser.add_argument('--improve-seconds', type=float, default=None,
+                        help='improve every schedule by local search for this many seconds')
+    parser.add_argument('--cache-dir', default=None, help='cache parsed preference files in this directory')
+    return parser.parse_args(argv)
+
+def main(argv: List[str] = None) -> int:
+    arguments = parseArguments(argv)
+    logging.basicConfig(level=logging.WARNING)
+    inputs = findInputs(arguments.inputs)
+
+    start = time.perf_counter()
+    results = runBatch(inputs, arguments.output_dir, arguments.workers, arguments.max_work_day,
+                       arguments.strategy, arguments.seed, arguments.format, arguments.stats, arguments.strict,
+                       arguments.cache_dir, arguments.improve_seconds)
+    printSummary(results, time.perf_counter() - start)
+    if arguments.stats:
+        for result in results:
+            if result['stats'] is not None:
+                print(json.dumps({'site': result['site'], **result['stats']}))
+    return 1 if any(result['error'] for result in results) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -356,15 +356,18 @@ private:
     }
 };
 
-int main() {
+int main(int argc, char* argv[]) {
+    // usage: manage_employee_schedule [preference file] [output file]
+    std::string input = argc > 1 ? argv[1] : "input/preference_schedule.yaml";
+    std::string output = argc > 2 ? argv[2] : "output/schedule_cpp.yaml";
     try {
         ManageSchedule schedule;
 
-        schedule.getPreference("/Users/peeratienthong/manage_employee_schedule/input/preference_schedule.yaml");
+        schedule.getPreference(input);
         schedule.assignShift(5);
         std::cout << "Successfully assigned shift to employees" << std::endl;
-        schedule.writeOutput("/Users/peeratienthong/manage_employee_schedule/output/schedule_cpp.yaml");
-        std::cout << "Successfully wrote the schedule to output/schedule.yaml" << std::endl;
+        schedule.writeOutput(output);
+        std::cout << "Successfully wrote the schedule to " << output << std::endl;
     } catch (const std::exception& e) {
         std::cerr << e.what() << std::endl;
         return 1;
@@ -1,154 +1,400 @@
-from typing import List, Dict, Set
-from enum import Enum
+from typing import List, Dict, Set, Optional, Tuple, Iterable
 import logging
-import yaml
 import random
-logging.basicConfig(level=logging.INFO)
-
-class Shift(Enum):
-    MORNING = 0
-    AFTERNOON = 1
-    EVENING = 2
-
-class Day(Enum):
-    MONDAY = 1
-    TUESDAY = 2
-    WEDNESDAY = 3
-    THURSDAY = 4
-    FRIDAY = 5
-    SATURDAY = 6
-    SUNDAY = 7
+import heapq
+import time
+from contextlib import nullcontext
+# Shift and Day were defined here before schedule_codes, Shift is re-exported for `from manage_employee_schedule import Shift`
+from schedule_codes import Shift  # noqa: F401
+from schedule_codes import Day, NUM_DAYS, NUM_SHIFTS, ALL_DAYS, SHIFT_CAPACITY, DAY_NAMES, SHIFT_NAMES, DAY_CODES, SHIFT_CODES, SLOT_NAMES, SLOT_CODES, NEXT_DAYS, parseDay, parseShift, parseCapacity
+from preference_loader import iterEmployees, parseEmployee
+from schedule_writer import writeSchedule
+from optimal_assignment import solveAssignment
+from local_search import improveAssignment
+from schedule_stats import ScheduleStats
+from preference_validation import ValidationReport, PreferenceValidationError, validateCodes
+from preference_cache import PreferenceCache
+
+logger = logging.getLogger(__name__)
+
+STRATEGIES = ('greedy', 'optimal')
 
 class ManageSchedule:
-    def __init__(self):
+    def __init__(self, name: str = 'schedule', stats: bool = False, capacity=SHIFT_CAPACITY):
+        self.name = name # site or schedule name
+        self.capacity = parseCapacity(capacity) # [day code][shift code] = maximum employees, see setCapacity
+        self.stats = ScheduleStats() if stats else None # per phase timings and counters, None when disabled
         self.employeeSchedule = {} # {name: [(day1,shift1), (day2,shift2), ...]}
         self.employeeNumberPerShiftDay = {} # {day: [[morning,x],[afternoon,y],[evening,z]]}
-        self.preferences = {} # {name: [(day1,shift1), (day2,shift2), ...]}
+        self.preferences = {} # {name: [(DAY1,SHIFT1), (DAY2,SHIFT2), ...]}
+
+        # compact state, indexed by day code (0-6) and shift code (0-2)
+        self.shiftCounts = [] # [[morning, afternoon, evening], ...] rows shared with employeeNumberPerShiftDay
+        self.preferenceCodes = {} # {name: [(dayCode1, shiftCode1), ...]}
+        self.workDays = {} # {name: bitmask of assigned day codes}
+        self.openShifts = [] # [bitmask of shift codes with room, ...] per day code
+        self.openDays = 0 # bitmask of day codes with at least one open shift
+        self.slotPreferences = [[{} for _ in range(NUM_SHIFTS)] for _ in range(NUM_DAYS)] # [day][shift] = {name: None} of employees preferring it
+        self.slotRoster = [[{} for _ in range(NUM_SHIFTS)] for _ in range(NUM_DAYS)] # [day][shift] = {name: None} of employees assigned to it
+
+        self.unknownSlots = [] # [(name, day, shift), ...] preferences left out while loading, see validatePreferences
+        self.duplicateNames = [] # [name, ...] employees listed again while loading, the first entry is kept
+
+        self.maxWorkDay = 5 # of the last assignShift, used by the incremental methods
+        self.seed = None # of the last assignShift, tie break of the least loaded index
+        self.scheduleChanges = None # [(name, slot, +1 or -1), ...] while an incremental method runs
+        # least loaded index of the incremental methods, built on their first fill and kept up to date by
+        # setScheduleCode and removeScheduleCode; None until then
+        self.loadIndex = None # {name: (assigned shifts, random tie break)}
+        self.loadBuckets = [] # [assigned shifts] = heap of (random tie break, name), entries not in loadIndex are stale
+        self.loadRandom = None # random.Random(seed) drawing the tie breaks
+
+        self.assignmentReport = {} # filled by assignOptimal
 
         self.initializeEmployeePerShiftDay()
-        
-    def getPreference(self, filename: str) -> None:
+
+    def getPreference(self, filename: str, cache: Optional[PreferenceCache] = None) -> None:
         '''
         set a preference of employees' schedule
         return true if successful
+
+        employees are streamed one at a time from a yaml or json lines file (see preference_loader),
+        day and shift strings are parsed once here into codes used by assignShift.
+        With a cache, a file whose content was parsed before is read from the cache without parsing
+        '''
+        with self.timed('load'):
+            if cache is None:
+                for name, codes in iterEmployees(filename, self.unknownSlots):
+                    self.loadEmployee(name.upper(), codes)
+            else:
+                self.loadCached(filename, cache)
+        logger.debug('finish loading preferences of %d employees', len(self.preferences))
+
+    def loadCached(self, filename: str, cache: PreferenceCache) -> None:
+        '''
+        load the preference file through the cache, on a miss every parsed employee is loaded
+        while it is written to the cache, the roster is not held in memory twice
+        '''
+        key = cache.key(filename)
+        entry = cache.load(key)
+        unknown = []
+        if entry is None:
+            def loading():
+                for name, codes in iterEmployees(filename, unknown):
+                    self.loadEmployee(name.upper(), codes)
+                    yield name, codes
+            cache.store(key, loading(), unknown)
+            logger.debug('stored %s in the preference cache', filename)
+        else:
+            employees, unknown = entry
+            for name, codes in employees:
+                self.loadEmployee(name.upper(), codes)
+            logger.debug('read %s from the preference cache', filename)
+        self.unknownSlots.extend(unknown)
+
+    def copyPreferences(self, name: Optional[str] = None, capacity=None) -> 'ManageSchedule':
+        '''
+        return a new unassigned schedule with the loaded preferences of this one, e.g. to try
+        another capacity or maxWorkDay without loading the file again
+
+        the preference lists are shared, the dicts holding them are copied
+        '''
+        schedule = ManageSchedule(self.name if name is None else name, stats=self.stats is not None,
+                                  capacity=self.capacity if capacity is None else capacity)
+        schedule.preferences = dict(self.preferences)
+        schedule.preferenceCodes = dict(self.preferenceCodes)
+        schedule.slotPreferences = [[dict(names) for names in row] for row in self.slotPreferences]
+        schedule.unknownSlots = list(self.unknownSlots)
+        schedule.duplicateNames = list(self.duplicateNames)
+        return schedule
+
+    def loadEmployees(self, employees: Iterable[dict]) -> None:
+        '''
+        set preferences from employee entries already in memory, in the format of the preference file, e.g.
+        [{'name': 'Bob', 'preferences': [{'day': 'Mon', 'time': 'morning'}]}]
+        '''
+        for employee in employees:
+            name, codes = parseEmployee(employee, self.unknownSlots)
+            self.loadEmployee(name.upper(), codes)
+
+    def loadEmployee(self, name: str, codes: List[Tuple[int, int]]) -> None:
+        '''
+        set the preference codes of a loaded (upper case) employee name, unless the name was loaded before
         '''
-        with open(filename, 'r') as file:
-            preferences = yaml.safe_load(file)
-        logging.debug(f'finish loading preferences: {preferences}')
+        if name in self.preferences:
+            self.duplicateNames.append(name)
+            return
+        self.setPreferenceCodes(name, codes)
 
-        for i, employee in enumerate(preferences['employees']):
-            slots = []
-            for j, slot in enumerate(employee['preferences']):
-                day = slot['day']
-                shift = slot['time']
-                slots.append((day, shift))
-            self.preferences[employee['name'].upper()] = slots
+    def setPreferenceCodes(self, name: str, codes: List[Tuple[int, int]]) -> None:
+        '''
+        set the preferred (day code, shift code) of the (upper case) employee name
+        '''
+        for day, shift in self.preferenceCodes.get(name, ()):
+            self.slotPreferences[day][shift].pop(name, None)
+        self.preferences[name] = [SLOT_NAMES[day][shift] for day, shift in codes]
+        self.preferenceCodes[name] = codes
+        for day, shift in codes:
+            self.slotPreferences[day][shift][name] = None
+        if self.loadIndex is not None and name not in self.loadIndex:
+            self.indexLoad(name)
 
-    def writeOutput(self, filename: str) -> None:
+    def writeOutput(self, filename: str, format: str = None) -> None:
         '''
         write the output to the file
         return true if successful
+
+        format is one of schedule_writer.FORMATS (yaml, json, jsonl, binary),
+        by default it follows the file extension
         '''
-        with open(filename, 'w') as file:
-            yaml.dump(self.employeeSchedule, file)
-        logging.debug(f'successfully wrote the schedule to {filename}')
-    
+        with self.timed('write'):
+            writeSchedule(self.employeeSchedule, filename, format)
+        logger.debug('successfully wrote the schedule to %s', filename)
+
     def initializeEmployeePerShiftDay(self) -> None:
         '''
         initialize employeePerShiftDay with empty list
+
+        employeeNumberPerShiftDay[day name] and shiftCounts[day code] are the same list
         '''
+        self.shiftCounts = [[0] * NUM_SHIFTS for _ in range(NUM_DAYS)]
+        self.updateOpenShifts()
         for day in (Day):
-            self.employeeNumberPerShiftDay[day.name] = [0, 0, 0]
-        logging.info('finish initializing employeeNumberPerShiftDay')
-        
-    def assignShift(self, maxWorkDay: int = 5) -> None:
+            self.employeeNumberPerShiftDay[day.name] = self.shiftCounts[day.value - 1]
+        logger.debug('finish initializing employeeNumberPerShiftDay')
+
+    def setCapacity(self, capacity) -> None:
+        '''
+        set the maximum employees per (day, shift), an int or a table (see schedule_codes.parseCapacity),
+        e.g. setCapacity({'Sat': 3, 'Sun': 3}) for 3 employees per weekend shift and 2 otherwise
+        '''
+        self.capacity = parseCapacity(capacity)
+        self.updateOpenShifts()
+
+    def updateOpenShifts(self) -> None:
+        '''
+        recompute openShifts and openDays from shiftCounts and capacity
+        '''
+        self.openShifts = [sum(1 << shift for shift in range(NUM_SHIFTS) if counts[shift] < capacity[shift])
+                           for counts, capacity in zip(self.shiftCounts, self.capacity)]
+        self.openDays = sum(1 << day for day in range(NUM_DAYS) if self.openShifts[day])
+
+    def countUnfilledSlots(self) -> int:
+        '''
+        return the number of missing employees over every (day, shift)
+        '''
+        return sum(max(capacity - count, 0) for counts, capacities in zip(self.shiftCounts, self.capacity)
+                   for count, capacity in zip(counts, capacities))
+
+    def assignShift(self, maxWorkDay: int = 5, strategy: str = 'greedy', seed: Optional[int] = None, strict: bool = False,
+                    improveSeconds: Optional[float] = None, capacity=None) -> None:
         '''
         assign shift to employees
 
         This method will assign shift to employees based on their preferences.
-        Use this following methods
+        strategy 'greedy' takes preferences in insertion order (assignPreferences),
+        strategy 'optimal' solves them together as a min-cost flow (assignOptimal).
+        Both finish by filling under staffed shifts, seed makes the fill reproducible.
+        Preferences are validated first, see validatePreferences for strict.
+        With improveSeconds, improveSchedule runs for that long afterwards.
+        capacity replaces the capacity table of the schedule first, see setCapacity.
         '''
-        for name, _ in self.preferences.items():
-            if not self.isOneShiftPerDay(name):
-                logging.error(f'employee {name} has more than one preference shift per day!')
-                break
-            if self.getNumofWorkPreference(name) > maxWorkDay:
-                logging.error(f'employee {name} has preference work more than 5 days!')
-                break
+        if strategy not in STRATEGIES:
+            raise ValueError(f'invalid strategy: {strategy}')
+        if capacity is not None:
+            self.setCapacity(capacity)
+        self.maxWorkDay = maxWorkDay
+        self.seed = seed
+        self.loadIndex = None
+        self.validatePreferences(maxWorkDay, strict)
 
-        for name, preference in self.preferences.items():
-            for day, shift in preference:
-                if shift == 'morning':
-                    numMorning, _, _ = self.getEmployeeNumPerShiftDay(day)
-                    if self.getNumberofWorkAssigned(name) < maxWorkDay and numMorning < 2:
-                        self.updateEmployeeNumPerShiftDay(day, shift)
-                        self.setEmployeeSchedule(name, day, shift)
-                    else:
-                        # assign alternate shift
-                        shift = self.findAvailableShiftDay(name, day, maxWorkDay)
-                        if shift is not None:
-                            self.setEmployeeSchedule(name, day, shift)
-                            self.updateEmployeeNumPerShiftDay(day, shift)
-                        else:
-                            # assign shift to the employee next available day
-                            for next_day in self.findNextDays(day):
-                                shift = self.findAvailableShiftDay(name, next_day, maxWorkDay)
-                                if shift is None:
-                                    continue
-                                else:    
-                                    self.setEmployeeSchedule(name, next_day, shift)
-                                    self.updateEmployeeNumPerShiftDay(next_day, shift)
-                                    break
-                elif shift == 'afternoon':
-                    _, numAfternoon, _ = self.getEmployeeNumPerShiftDay(day)
-                    if self.getNumberofWorkAssigned(name) < maxWorkDay and numAfternoon < 2:
-                        self.updateEmployeeNumPerShiftDay(day, shift)
-                        self.setEmployeeSchedule(name, day, shift)
-                    else:
-                        # assign alternate shift
-                        shift = self.findAvailableShiftDay(name, day, maxWorkDay)
-                        if shift is not None:
-                            self.setEmployeeSchedule(name, day, shift)
-                            self.updateEmployeeNumPerShiftDay(day, shift)
-                        else:
-                            # assign shift to the employee next available day
-                            for next_day in self.findNextDays(day):
-                                shift = self.findAvailableShiftDay(name, next_day, maxWorkDay)
-                                if shift is None:
-                                    continue
-                                else:    
-                                    self.setEmployeeSchedule(name, next_day, shift)
-                                    self.updateEmployeeNumPerShiftDay(next_day, shift)
-                                    break
-                elif shift == 'evening':
-                    _, _, numEvening = self.getEmployeeNumPerShiftDay(day)
-                    if self.getNumberofWorkAssigned(name) < maxWorkDay and numEvening < 2:
-                        self.updateEmployeeNumPerShiftDay(day, shift)
-                        self.setEmployeeSchedule(name, day, shift)
-                    else:
-                        # assign alternate shift
-                        shift = self.findAvailableShiftDay(name, day, maxWorkDay)
-                        if shift is not None:
-                            self.setEmployeeSchedule(name, day, shift)
-                            self.updateEmployeeNumPerShiftDay(day, shift)
-                        else:
-                            # assign shift to the employee next available day
-                            for next_day in self.findNextDays(day):
-                                shift = self.findAvailableShiftDay(name, next_day, maxWorkDay)
-                                if shift is None:
-                                    continue
-                                else:    
-                                    self.setEmployeeSchedule(name, next_day, shift)
-                                    self.updateEmployeeNumPerShiftDay(next_day, shift)
-                                    break
-                else:
-                    logging.error(f'invalid shift: {shift}')
-                    ValueError(f'invalid shift: {shift}')
-                    break
+        if strategy == 'optimal':
+            self.assignOptimal(maxWorkDay)
+        else:
+            self.assignPreferences(maxWorkDay)
 
         # fill under staffed shifts
-        self.fillUnderStaffedÍhifts()       
-                        
+        self.fillUnderStaffedÍhifts(maxWorkDay, seed)
+
+        if improveSeconds is not None:
+            self.improveSchedule(seconds=improveSeconds, seed=seed)
+
+    def checkPreferences(self, maxWorkDay: int = 5) -> bool:
+        '''
+        return true if every employee prefers one shift per day and at most maxWorkDay days,
+        and no preference or employee was left out while loading; log the problems otherwise
+        '''
+        report = self.preferenceReport(maxWorkDay)
+        if not report.ok:
+            logger.error('invalid preferences: %s', report)
+        return report.ok
+
+    def preferenceReport(self, maxWorkDay: int = 5) -> ValidationReport:
+        '''
+        return the ValidationReport of the roster without changing it
+        '''
+        report, _ = self.findInvalidPreferences(maxWorkDay)
+        return report
+
+    def validatePreferences(self, maxWorkDay: int = 5, strict: bool = False) -> ValidationReport:
+        '''
+        validate the whole roster in one pass and return the ValidationReport
+
+        strict raises PreferenceValidationError when the report has any problem, otherwise the bad
+        entries are dropped: a second preference for the same day and the preferences past maxWorkDay.
+        Unknown day/shift tokens and repeated employees are already left out while loading
+        '''
+        report, cleaned = self.findInvalidPreferences(maxWorkDay)
+        if report.ok:
+            return report
+        if strict:
+            raise PreferenceValidationError(report)
+        logger.warning('dropping invalid preferences: %s', report)
+        for name, codes in cleaned.items():
+            self.setPreferenceCodes(name, codes)
+        return report
+
+    def findInvalidPreferences(self, maxWorkDay: int) -> Tuple[ValidationReport, Dict[str, List[Tuple[int, int]]]]:
+        '''
+        return the ValidationReport and the cleaned codes of validateCodes
+        '''
+        with self.timed('validate'):
+            report = ValidationReport(maxWorkDay)
+            report.unknownSlots.extend(self.unknownSlots)
+            report.duplicateNames.extend(self.duplicateNames)
+            cleaned = validateCodes(self.preferenceCodes, maxWorkDay, report)
+        return report, cleaned
+
+    def assignPreferences(self, maxWorkDay: int = 5) -> None:
+        '''
+        greedy pass over preferences in insertion order
+
+        A preferred shift that is full falls back to the next open shift of the same day
+        and then of the following days (findOpenSlot).
+        '''
+        with self.timed('preferences'):
+            for name in self.preferenceCodes.keys():
+                self.assignEmployee(name, maxWorkDay)
+
+    def assignEmployee(self, name: str, maxWorkDay: int = 5) -> None:
+        '''
+        greedy pass over the preferences of one (upper case) employee name, see assignPreferences
+
+        preferred shifts the employee already has are kept as they are
+        '''
+        stats = self.stats
+        schedule = self.employeeSchedule.get(name, ())
+        for day, shift in self.preferenceCodes[name]:
+            if self.getNumberofWorkAssigned(name) >= maxWorkDay:
+                break
+            if SLOT_NAMES[day][shift] in schedule:
+                continue
+            if self.openShifts[day] >> shift & 1 and not self.workDays.get(name, 0) >> day & 1:
+                self.countShift(day, shift)
+                self.setScheduleCode(name, day, shift)
+                schedule = self.employeeSchedule[name]
+                if stats is not None:
+                    stats.count('preferencesHonored')
+                continue
+
+            # assign the next open shift, on the same day first and then the following days
+            if stats is None:
+                slot = self.findOpenSlot(name, day)
+            else:
+                start = time.perf_counter()
+                slot = self.findOpenSlot(name, day)
+                fallback = 'sameDay' if slot is not None and slot[0] == day else 'nextDay'
+                stats.addTime(fallback + 'Fallback', time.perf_counter() - start)
+                stats.count(fallback + 'Fallbacks' if slot is not None else 'unassignedPreferences')
+            if slot is not None:
+                self.setScheduleCode(name, *slot)
+                self.countShift(*slot)
+                schedule = self.employeeSchedule[name]
+
+    def assignOptimal(self, maxWorkDay: int = 5) -> None:
+        '''
+        assign the schedule that satisfies the most preferences (see optimal_assignment)
+
+        assignmentReport records the satisfied preferences next to the greedy pass on the same input
+        '''
+        with self.timed('preferences'):
+            assignment, satisfied = solveAssignment(self.preferenceCodes, maxWorkDay, self.capacity)
+            for name, slots in assignment.items():
+                for day, shift in slots:
+                    self.setScheduleCode(name, day, shift)
+                    self.countShift(day, shift)
+        if self.stats is not None:
+            self.stats.count('preferencesHonored', satisfied)
+
+        greedy = ManageSchedule(capacity=self.capacity)
+        greedy.preferences = self.preferences
+        greedy.preferenceCodes = self.preferenceCodes
+        greedy.assignPreferences(maxWorkDay)
+        self.assignmentReport = {
+            'strategy': 'optimal',
+            'preferences': sum(len(codes) for codes in self.preferenceCodes.values()),
+            'satisfied': satisfied,
+            'greedySatisfied': greedy.countSatisfiedPreferences(),
+        }
+        logger.info('optimal assignment satisfied %d preferences, greedy %d', satisfied, self.assignmentReport['greedySatisfied'])
+
+    def improveSchedule(self, seconds: Optional[float] = None, iterations: Optional[int] = None,
+                        seed: Optional[int] = None) -> List[Tuple[int, float, int]]:
+        '''
+        improve the assigned schedule by swap and move local search (see local_search) under a wall clock
+        and/or iteration budget, keeping the best schedule found
+
+        return the score trace [(iteration, seconds, best score), ...]
+        '''
+        with self.timed('improve'):
+            current = {name: [SLOT_CODES[DAY_CODES[day]][SHIFT_CODES[shift]] for day, shift in schedule]
+                       for name, schedule in self.employeeSchedule.items()}
+            improved, trace = improveAssignment(current, self.preferenceCodes, self.maxWorkDay, self.capacity,
+                                                seconds, iterations, seed)
+            changes = {}
+            for name in current.keys() | improved.keys():
+                before, after = current.get(name, []), improved.get(name, [])
+                if set(before) != set(after):
+                    changes[name] = (set(before) - set(after), [slot for slot in after if slot not in before])
+            for name, (removed, _) in changes.items():
+                for day, shift in removed:
+                    self.removeScheduleCode(name, day, shift)
+                    self.uncountShift(day, shift)
+            for name, (_, added) in changes.items():
+                for day, shift in added:
+                    self.setScheduleCode(name, day, shift)
+                    self.countShift(day, shift)
+        if self.stats is not None:
+            self.stats.counters['unfilledSlots'] = self.countUnfilledSlots()
+        logger.info('local search improved the score from %d to %d', trace[0][2], trace[-1][2])
+        return trace
+
+    def timed(self, phase: str):
+        '''
+        return a context manager adding its wall time to the phase of stats, which does nothing when stats are disabled
+        '''
+        if self.stats is None:
+            return nullcontext()
+        return self.stats.phase(phase)
+
+    def enableStats(self) -> ScheduleStats:
+        '''
+        start recording stats (see schedule_stats), return the stats object
+        '''
+        if self.stats is None:
+            self.stats = ScheduleStats()
+        return self.stats
+
+    def countSatisfiedPreferences(self) -> int:
+        '''
+        return the number of assigned (day, shift) which are preferred by the employee
+        '''
+        satisfied = 0
+        for name, schedule in self.employeeSchedule.items():
+            preferred = set(self.preferences.get(name, ()))
+            satisfied += sum(1 for slot in schedule if slot in preferred)
+        return satisfied
+
     def isOneShiftPerDay(self, name: str) -> bool:
         '''
         return true if one shift per day of the employee
@@ -156,33 +402,33 @@ class ManageSchedule:
         isOneShiftPerDay: this condition will go through preferences and check if the employee has only one shift per day
         e.g. compare tuple (day1,shift1) and (day2, shift2) if day1 == day2 then isOneShiftPerday is false
 
-        datastructure: preferences
+        datastructure: preferenceCodes, the days seen so far are a bitmask
         is used in assignShift method
         '''
-        perference_list = self.preferences[name.upper()]
-        for i in range(len(perference_list)):
-            for j in range(i+1, len(perference_list)):
-                if perference_list[i][0].upper() == perference_list[j][0].upper():
-                    return False
+        days = 0
+        for day, _ in self.preferenceCodes[name.upper()]:
+            if days >> day & 1:
+                return False
+            days |= 1 << day
         return True
-    
+
     def getNumofWorkPreference(self, name: str) -> int:
         '''
         return the number of days the employee works
 
         e.g. for employee A, count the number of tuples (day,shift) in preferences.
-        
+
         datastructure: preferences
         is used in assignShift method
         '''
         return len(self.preferences[name.upper()])
-    
+
     def getNumberofWorkAssigned(self, name: str) -> int:
         '''
         return the number of days the employee works
 
         e.g. for employee A, count the number of tuples (day,shift) in employeeSchedule.
-        
+
         datastructure: employeeSchedule
         is used in assignShift method
         '''
@@ -192,177 +438,405 @@ class ManageSchedule:
         '''
         return the number of employees per shift of the day (morning, afternoon, evening)
         in the following format (shift, number of employees)
-        
+
         e.g. 5, 3, 4 # morning, afternoon, evening
 
-        datastructure: employeeNumberPerShiftDay
+        datastructure: shiftCounts
         is used in assignShift method
 
         '''
-        match day.upper():
-            case 'MON':
-                numMorning = self.employeeNumberPerShiftDay[Day.MONDAY.name][Shift.MORNING.value]
-                numAfternoon = self.employeeNumberPerShiftDay[Day.MONDAY.name][Shift.AFTERNOON.value]
-                numEvening = self.employeeNumberPerShiftDay[Day.MONDAY.name][Shift.EVENING.value]
-            case 'TUE':
-                numMorning = self.employeeNumberPerShiftDay[Day.TUESDAY.name][Shift.MORNING.value]
-                numAfternoon = self.employeeNumberPerShiftDay[Day.TUESDAY.name][Shift.AFTERNOON.value]
-                numEvening = self.employeeNumberPerShiftDay[Day.TUESDAY.name][Shift.EVENING.value]
-            case 'WED':
-                numMorning = self.employeeNumberPerShiftDay[Day.WEDNESDAY.name][Shift.MORNING.value]
-                numAfternoon = self.employeeNumberPerShiftDay[Day.WEDNESDAY.name][Shift.AFTERNOON.value]
-                numEvening = self.employeeNumberPerShiftDay[Day.WEDNESDAY.name][Shift.EVENING.value]
-            case 'THU':
-                numMorning = self.employeeNumberPerShiftDay[Day.THURSDAY.name][Shift.MORNING.value]
-                numAfternoon = self.employeeNumberPerShiftDay[Day.THURSDAY.name][Shift.AFTERNOON.value]
-                numEvening = self.employeeNumberPerShiftDay[Day.THURSDAY.name][Shift.EVENING.value]
-            case 'FRI':
-                numMorning = self.employeeNumberPerShiftDay[Day.FRIDAY.name][Shift.MORNING.value]
-                numAfternoon = self.employeeNumberPerShiftDay[Day.FRIDAY.name][Shift.AFTERNOON.value]
-                numEvening = self.employeeNumberPerShiftDay[Day.FRIDAY.name][Shift.EVENING.value]
-            case 'SAT':
-                numMorning = self.employeeNumberPerShiftDay[Day.SATURDAY.name][Shift.MORNING.value]
-                numAfternoon = self.employeeNumberPerShiftDay[Day.SATURDAY.name][Shift.AFTERNOON.value]
-                numEvening = self.employeeNumberPerShiftDay[Day.SATURDAY.name][Shift.EVENING.value]
-            case 'SUN':
-                numMorning = self.employeeNumberPerShiftDay[Day.SUNDAY.name][Shift.MORNING.value]
-                numAfternoon = self.employeeNumberPerShiftDay[Day.SUNDAY.name][Shift.AFTERNOON.value]
-                numEvening = self.employeeNumberPerShiftDay[Day.SUNDAY.name][Shift.EVENING.value]
-            case _:
-                numMorning = self.employeeNumberPerShiftDay[Day[day.upper()].name][Shift.MORNING.value]
-                numAfternoon = self.employeeNumberPerShiftDay[Day[day.upper()].name][Shift.AFTERNOON.value]
-                numEvening = self.employeeNumberPerShiftDay[Day[day.upper()].name][Shift.EVENING.value]
-        
-        return (numMorning, numAfternoon, numEvening)
-    
+        return tuple(self.shiftCounts[parseDay(day)])
+
     def updateEmployeeNumPerShiftDay(self, day: str, shift: str) -> None:
         '''
         update the number of employees per shift of the day (morning, afternoon, evening)
         '''
-        match day.upper():
-            case 'MON':
-                self.employeeNumberPerShiftDay[Day.MONDAY.name][Shift[shift.upper()].value] += 1
-            case 'TUE':
-                self.employeeNumberPerShiftDay[Day.TUESDAY.name][Shift[shift.upper()].value] += 1
-            case 'WED':
-                self.employeeNumberPerShiftDay[Day.WEDNESDAY.name][Shift[shift.upper()].value] += 1
-            case 'THU':
-                self.employeeNumberPerShiftDay[Day.THURSDAY.name][Shift[shift.upper()].value] += 1
-            case 'FRI':
-                self.employeeNumberPerShiftDay[Day.FRIDAY.name][Shift[shift.upper()].value] += 1
-            case 'SAT':
-                self.employeeNumberPerShiftDay[Day.SATURDAY.name][Shift[shift.upper()].value] += 1
-            case 'SUN':
-                self.employeeNumberPerShiftDay[Day.SUNDAY.name][Shift[shift.upper()].value] += 1
-            case _:
-                self.employeeNumberPerShiftDay[Day[day.upper()].name][Shift[shift.upper()].value] += 1
+        self.countShift(parseDay(day), parseShift(shift))
         return None
-    
+
     def setEmployeeSchedule(self, name: str, day: str, shift: str) -> None:
         '''
         set the employee schedule
         '''
-        match day.upper():
-                case 'MON':
-                    schedule = (Day.MONDAY.name, Shift[shift.upper()].name)
-                case 'TUE':
-                    schedule = (Day.TUESDAY.name, Shift[shift.upper()].name)
-                case 'WED':
-                    schedule = (Day.WEDNESDAY.name, Shift[shift.upper()].name)
-                case 'THU':
-                    schedule = (Day.THURSDAY.name, Shift[shift.upper()].name)
-                case 'FRI':
-                    schedule = (Day.FRIDAY.name, Shift[shift.upper()].name)
-                case 'SAT':
-                    schedule = (Day.SATURDAY.name, Shift[shift.upper()].name)
-                case 'SUN':
-                    schedule = (Day.SUNDAY.name, Shift[shift.upper()].name)
-                case _:
-                    schedule = (Day[day.upper()].name, Shift[shift.upper()].name)
-        
-        if name.upper() not in self.employeeSchedule.keys():
-            self.employeeSchedule[name.upper()] = []
-            self.employeeSchedule[name.upper()].append(schedule)
-        else:
-            self.employeeSchedule[name.upper()].append(schedule)
-
+        self.setScheduleCode(name.upper(), parseDay(day), parseShift(shift))
         return None
-    
+
+    def countShift(self, day: int, shift: int) -> None:
+        '''
+        add one employee to the shift code of the day code and close the shift once it is full
+        '''
+        counts = self.shiftCounts[day]
+        counts[shift] += 1
+        if counts[shift] >= self.capacity[day][shift]:
+            self.openShifts[day] &= ~(1 << shift)
+            if not self.openShifts[day]:
+                self.openDays &= ~(1 << day)
+
+    def setScheduleCode(self, name: str, day: int, shift: int) -> None:
+        '''
+        append (day, shift) codes to the schedule of the (upper case) employee name
+        '''
+        schedule = self.employeeSchedule.get(name)
+        if schedule is None:
+            schedule = self.employeeSchedule[name] = []
+        schedule.append(SLOT_NAMES[day][shift])
+        self.workDays[name] = self.workDays.get(name, 0) | (1 << day)
+        self.slotRoster[day][shift][name] = None
+        if self.loadIndex is not None and name in self.loadIndex:
+            self.indexLoad(name)
+        if self.scheduleChanges is not None:
+            self.scheduleChanges.append((name, SLOT_NAMES[day][shift], 1))
+
+    def uncountShift(self, day: int, shift: int) -> None:
+        '''
+        remove one employee from the shift code of the day code and reopen the shift
+        '''
+        self.shiftCounts[day][shift] -= 1
+        if self.shiftCounts[day][shift] < self.capacity[day][shift]:
+            self.openShifts[day] |= 1 << shift
+            self.openDays |= 1 << day
+
+    def removeScheduleCode(self, name: str, day: int, shift: int) -> None:
+        '''
+        remove (day, shift) codes from the schedule of the (upper case) employee name
+        '''
+        schedule = self.employeeSchedule[name]
+        schedule.remove(SLOT_NAMES[day][shift])
+        if not any(DAY_CODES[scheduledDay] == day for scheduledDay, _ in schedule):
+            self.workDays[name] &= ~(1 << day)
+        self.slotRoster[day][shift].pop(name, None)
+        if self.loadIndex is not None and name in self.loadIndex:
+            self.indexLoad(name)
+        if self.scheduleChanges is not None:
+            self.scheduleChanges.append((name, SLOT_NAMES[day][shift], -1))
+
     def findAvailableShiftDay(self, name: str, day: str, maxWorkDay: int) -> str:
         '''
         find available shift
         '''
-        numMorning, numAfternoon, numEvening = self.getEmployeeNumPerShiftDay(day)
-        for shift in ['morning', 'afternoon', 'evening']:
-            if shift == 'morning' and numMorning < 2:
-                if self.getNumberofWorkAssigned(name) < maxWorkDay:
-                    return 'morning'
-            elif shift == 'afternoon' and numAfternoon < 2:
-                if self.getNumberofWorkAssigned(name) < maxWorkDay:
-                    return 'afternoon'
-            elif shift == 'evening' and numEvening < 2:
-                if self.getNumberofWorkAssigned(name) < maxWorkDay:
-                    return 'evening'
-            else:
-                return None
-        
+        shift = self.findAvailableShiftCode(name.upper(), parseDay(day), maxWorkDay)
+        if shift is None:
+            return None
+        return SHIFT_NAMES[shift].lower()
+
+    def findAvailableShiftCode(self, name: str, day: int, maxWorkDay: int) -> Optional[int]:
+        '''
+        return the first shift code of the day code which is not full
+        '''
+        shifts = self.openShifts[day]
+        if not shifts or self.getNumberofWorkAssigned(name) >= maxWorkDay:
+            return None
+        return (shifts & -shifts).bit_length() - 1
+
+    def findOpenSlot(self, name: str, day: int) -> Optional[Tuple[int, int]]:
+        '''
+        return the next open (day code, shift code) at or after the day code, wrapping around the week,
+        on a day the employee does not work yet
+
+        the open days are rotated so the day code is bit 0, the lowest set bit is then the next open day
+        '''
+        days = self.openDays & ~self.workDays.get(name, 0)
+        if not days:
+            return None
+        rotated = ((days >> day) | (days << (NUM_DAYS - day))) & ALL_DAYS
+        day = (day + (rotated & -rotated).bit_length() - 1) % NUM_DAYS
+        shifts = self.openShifts[day]
+        return day, (shifts & -shifts).bit_length() - 1
+
     def findNextDays(self, day: str) -> tuple:
         '''
         return the next days
         '''
-        match day.upper():
-            case 'MON':
-                return ('TUE', 'WED', 'THU', 'FRI', 'SAT', 'SUN')
-            case 'TUE':
-                return ('WED', 'THU', 'FRI', 'SAT', 'SUN', 'MON')
-            case 'WED':
-                return ('THU', 'FRI', 'SAT', 'SUN', 'MON', 'TUE')
-            case 'THU':
-                return ('FRI', 'SAT', 'SUN', 'MON', 'TUE', 'WED')
-            case 'FRI':
-                return ('SAT', 'SUN', 'MON', 'TUE', 'WED', 'THU')
-            case 'SAT':
-                return ('SUN', 'MON', 'TUE', 'WED', 'THU', 'FRI')
-            case 'SUN':
-                return ('MON', 'TUE', 'WED', 'THU', 'FRI', 'SAT')
-            case _:
-                return ()
-    
-    def fillUnderStaffedÍhifts(self):
-        '''
-        fill the under staffed shifts
-        '''
-        availableEmployees = [name for name in self.preferences.keys() if self.getNumberofWorkAssigned(name) < 5]
-        for day, shifts in self.employeeNumberPerShiftDay.items():
-            morning, afternoon, evening = self.getEmployeeNumPerShiftDay(day)
-            while morning < 2 and availableEmployees:
-                selectedName = random.choice(availableEmployees)
-                self.setEmployeeSchedule(selectedName, day, 'morning')
-                self.updateEmployeeNumPerShiftDay(day, 'morning')
-                morning, _, _ = self.getEmployeeNumPerShiftDay(day)
-                if self.getNumberofWorkAssigned(selectedName) == 5:
-                    availableEmployees.remove(selectedName)
-            while afternoon < 2 and availableEmployees:
-                selectedName = random.choice(availableEmployees)
-                self.setEmployeeSchedule(selectedName, day, 'afternoon')
-                self.updateEmployeeNumPerShiftDay(day, 'afternoon')
-                _, afternoon, _ = self.getEmployeeNumPerShiftDay(day)
-                if self.getNumberofWorkAssigned(selectedName) == 5:
-                    availableEmployees.remove(selectedName)
-            while evening < 2 and availableEmployees:
-                selectedName = random.choice(availableEmployees)
-                self.setEmployeeSchedule(selectedName, day, 'evening')
-                self.updateEmployeeNumPerShiftDay(day, 'evening')
-                _, _, evening = self.getEmployeeNumPerShiftDay(day)
-                if self.getNumberofWorkAssigned(selectedName) == 5:
-                    availableEmployees.remove(selectedName)
-    
-        
+        try:
+            day = parseDay(day)
+        except ValueError:
+            return ()
+        return tuple(DAY_NAMES[nextDay][:3] for nextDay in NEXT_DAYS[day])
+
+    def fillUnderStaffedÍhifts(self, maxWorkDay: int = 5, seed: Optional[int] = None) -> None:
+        '''
+        fill the under staffed shifts with the least loaded employees
+
+        employees wait in a heap of (assigned shifts, random tie break, name) so each fill costs O(log n);
+        an employee who already works the day is set aside until the next day.
+        the same seed always gives the same schedule
+        '''
+        with self.timed('fill'):
+            fills = self.fillShifts(maxWorkDay, seed)
+        if self.stats is not None:
+            self.stats.count('randomFills', fills)
+            self.stats.counters['unfilledSlots'] = self.countUnfilledSlots()
+
+    def fillShifts(self, maxWorkDay: int, seed: Optional[int]) -> int:
+        '''
+        fillUnderStaffedÍhifts without stats, return the number of filled shifts
+        '''
+        fills = 0
+        rng = random.Random(seed)
+        available = []
+        for name in self.preferences.keys():
+            load = self.getNumberofWorkAssigned(name)
+            if load < maxWorkDay:
+                available.append((load, rng.random(), name))
+        heapq.heapify(available)
+
+        for day in range(NUM_DAYS):
+            counts, capacity = self.shiftCounts[day], self.capacity[day]
+            workingToday = []
+            for shift in range(NUM_SHIFTS):
+                while counts[shift] < capacity[shift] and available:
+                    load, tieBreak, selectedName = heapq.heappop(available)
+                    if not self.workDays.get(selectedName, 0) >> day & 1:
+                        self.setScheduleCode(selectedName, day, shift)
+                        self.countShift(day, shift)
+                        fills += 1
+                        load += 1
+                        if load >= maxWorkDay:
+                            continue
+                        tieBreak = rng.random()
+                    workingToday.append((load, tieBreak, selectedName))
+            for employee in workingToday:
+                heapq.heappush(available, employee)
+        return fills
+
+    def getRoster(self, day: str, shift: str) -> List[str]:
+        '''
+        return the employees assigned to the shift of the day, e.g. getRoster('Wed', 'evening')
+        '''
+        return list(self.slotRoster[parseDay(day)][parseShift(shift)])
+
+    def getOpenSlots(self) -> List[Tuple[str, str]]:
+        '''
+        return the (day, shift) which still have room, walking only the open bits of openDays and openShifts
+        '''
+        slots = []
+        days = self.openDays
+        while days:
+            day = (days & -days).bit_length() - 1
+            days &= days - 1
+            shifts = self.openShifts[day]
+            while shifts:
+                shift = (shifts & -shifts).bit_length() - 1
+                shifts &= shifts - 1
+                slots.append(SLOT_NAMES[day][shift])
+        return slots
+
+    def getEmployeeWeek(self, name: str) -> List[Tuple[str, str]]:
+        '''
+        return the (day, shift) of the employee from monday to sunday
+        '''
+        return sorted(self.employeeSchedule.get(name.upper(), ()), key=lambda slot: DAY_CODES[slot[0]])
+
+    def getCoverageGaps(self) -> Dict[Tuple[str, str], int]:
+        '''
+        return {(day, shift): missing employees} of the under staffed shifts
+        '''
+        gaps = {}
+        for day, shift in self.getOpenSlots():
+            dayCode, shiftCode = DAY_CODES[day], SHIFT_CODES[shift]
+            gaps[(day, shift)] = self.capacity[dayCode][shiftCode] - self.shiftCounts[dayCode][shiftCode]
+        return gaps
+
+    def addEmployee(self, name: str, preferences: List[Tuple[str, str]]) -> Dict[str, list]:
+        '''
+        add a new employee with [(day, shift), ...] preferences to the current schedule
+
+        return the changed assignments, see updateEmployee
+        '''
+        if name.upper() in self.preferences:
+            raise ValueError(f'employee {name} already exists')
+        return self.updateEmployee(name, preferences)
+
+    def updateEmployee(self, name: str, preferences: List[Tuple[str, str]]) -> Dict[str, list]:
+        '''
+        replace the preferences of an employee and repair the current schedule
+
+        shifts the employee still prefers are kept, the others are released, the employee gets the new
+        preferences like in assignPreferences and the released shifts go to employees who prefer them
+        (repairShifts). Only the touched (day, shift) cells change.
+
+        return {'added': [(name, day, shift), ...], 'removed': [(name, day, shift), ...]}
+        '''
+        name = name.upper()
+        codes = [(parseDay(day), parseShift(shift)) for day, shift in preferences]
+        self.scheduleChanges = []
+        try:
+            self.setPreferenceCodes(name, codes)
+            released = self.releaseShifts(name, set(self.preferences[name]))
+            self.assignEmployee(name, self.maxWorkDay)
+            self.repairShifts(released)
+            self.fillTouchedShifts()
+            return self.collectChanges()
+        finally:
+            self.scheduleChanges = None
+
+    def removeEmployee(self, name: str) -> Dict[str, list]:
+        '''
+        remove an employee, the released shifts go to employees who prefer them (repairShifts)
+
+        return the changed assignments, see updateEmployee
+        '''
+        name = name.upper()
+        if name not in self.preferences:
+            raise ValueError(f'employee {name} does not exist')
+        self.scheduleChanges = []
+        try:
+            released = self.releaseShifts(name, set())
+            self.setPreferenceCodes(name, [])
+            del self.preferences[name], self.preferenceCodes[name]
+            if self.loadIndex is not None:
+                del self.loadIndex[name]
+            self.employeeSchedule.pop(name, None)
+            self.workDays.pop(name, None)
+            self.repairShifts(released)
+            self.fillTouchedShifts()
+            return self.collectChanges()
+        finally:
+            self.scheduleChanges = None
+
+    def releaseShifts(self, name: str, keep: Set[Tuple[str, str]]) -> List[Tuple[int, int]]:
+        '''
+        remove the shifts of the employee which are not in keep, return their (day code, shift code)
+        '''
+        released = []
+        for day, shift in list(self.employeeSchedule.get(name, ())):
+            if (day, shift) not in keep:
+                day, shift = DAY_CODES[day], SHIFT_CODES[shift]
+                self.removeScheduleCode(name, day, shift)
+                self.uncountShift(day, shift)
+                released.append((day, shift))
+        return released
+
+    def repairShifts(self, released: List[Tuple[int, int]]) -> None:
+        '''
+        give each released (day code, shift code) to the first employee who prefers it and can take it
+
+        an employee can take it with a free day below maxWorkDay, or by giving up a shift they did not prefer;
+        that shift is released in turn, so every step satisfies one more preference. A released shift
+        nobody can take stays open for fillUnderStaffedÍhifts.
+        '''
+        released = list(released)
+        while released:
+            day, shift = released.pop()
+            slot = SLOT_NAMES[day][shift]
+            for name in self.slotPreferences[day][shift]:
+                if not self.openShifts[day] >> shift & 1:
+                    break
+                schedule = self.employeeSchedule.get(name, [])
+                if slot in schedule:
+                    continue
+                preferred = self.preferences[name]
+                if self.workDays.get(name, 0) >> day & 1:
+                    # same day, swap a shift they did not prefer for this one
+                    giveUp = next((held for held in schedule if DAY_CODES[held[0]] == day), None)
+                elif len(schedule) < self.maxWorkDay:
+                    giveUp = None
+                else:
+                    giveUp = next((held for held in schedule if held not in preferred), None)
+                    if giveUp is None:
+                        continue
+                if giveUp is not None:
+                    if giveUp in preferred:
+                        continue
+                    giveUpCodes = (DAY_CODES[giveUp[0]], SHIFT_CODES[giveUp[1]])
+                    self.removeScheduleCode(name, *giveUpCodes)
+                    self.uncountShift(*giveUpCodes)
+                    released.append(giveUpCodes)
+                self.setScheduleCode(name, day, shift)
+                self.countShift(day, shift)
+
+    def fillTouchedShifts(self) -> None:
+        '''
+        fill the shifts an incremental method emptied and nobody preferring them took back,
+        with the least loaded employees who can take them (the rules and seeded tie break of fillShifts)
+        '''
+        cells = sorted({(DAY_CODES[day], SHIFT_CODES[shift]) for _, (day, shift), change in self.scheduleChanges
+                        if change < 0})
+        cells = [(day, shift) for day, shift in cells if self.shiftCounts[day][shift] < self.capacity[day][shift]]
+        if not cells:
+            return
+        if self.loadIndex is None:
+            self.buildLoadIndex()
+        for day, shift in cells:
+            while self.shiftCounts[day][shift] < self.capacity[day][shift]:
+                name = self.findLeastLoaded(day)
+                if name is None:
+                    break
+                self.setScheduleCode(name, day, shift)
+                self.countShift(day, shift)
+
+    def buildLoadIndex(self) -> None:
+        '''
+        index every employee by assigned shifts, tie breaks drawn in preference order like fillShifts
+        '''
+        self.loadRandom = random.Random(self.seed)
+        self.loadIndex = {}
+        self.loadBuckets = []
+        for name in self.preferences.keys():
+            load = self.getNumberofWorkAssigned(name)
+            tieBreak = self.loadRandom.random()
+            self.loadIndex[name] = (load, tieBreak)
+            while len(self.loadBuckets) <= load:
+                self.loadBuckets.append([])
+            self.loadBuckets[load].append((tieBreak, name))
+        for bucket in self.loadBuckets:
+            heapq.heapify(bucket)
+
+    def indexLoad(self, name: str) -> None:
+        '''
+        move the employee to the bucket of its current number of shifts with a new tie break, O(log n);
+        the previous entry turns stale and is dropped once it reaches the top of its heap
+        '''
+        load = self.getNumberofWorkAssigned(name)
+        tieBreak = self.loadRandom.random()
+        self.loadIndex[name] = (load, tieBreak)
+        while len(self.loadBuckets) <= load:
+            self.loadBuckets.append([])
+        heapq.heappush(self.loadBuckets[load], (tieBreak, name))
+
+    def findLeastLoaded(self, day: int) -> Optional[str]:
+        '''
+        return the employee below maxWorkDay with the fewest shifts and the lowest tie break who does not
+        work the day code yet, None if there is nobody
+        '''
+        loadIndex = self.loadIndex
+        for load, bucket in enumerate(self.loadBuckets[:self.maxWorkDay]):
+            setAside = []
+            found = None
+            while bucket:
+                tieBreak, name = bucket[0]
+                if loadIndex.get(name) != (load, tieBreak):
+                    heapq.heappop(bucket)
+                elif self.workDays.get(name, 0) >> day & 1:
+                    setAside.append(heapq.heappop(bucket))
+                else:
+                    found = name
+                    break
+            for entry in setAside:
+                heapq.heappush(bucket, entry)
+            if found is not None:
+                return found
+        return None
+
+    def collectChanges(self) -> Dict[str, list]:
+        '''
+        return the net added and removed (name, day, shift) of scheduleChanges
+        '''
+        net = {}
+        for name, slot, change in self.scheduleChanges:
+            net[(name, *slot)] = net.get((name, *slot), 0) + change
+        return {
+            'added': [key for key, change in net.items() if change > 0],
+            'removed': [key for key, change in net.items() if change < 0],
+        }
+
+
 if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
     schedule = ManageSchedule()
 
     schedule.getPreference('input/preference_schedule.yaml')
-    schedule.assignShift(maxWorkDay=5)
-    logging.info(f'successfully assigned shift to employees')
+    schedule.assignShift(maxWorkDay=5, seed=0)
+    logger.info('successfully assigned shift to employees')
     schedule.writeOutput('output/schedule.yaml')
-    logging.info(f'successfully wrote the schedule to output/schedule.yaml')
\ No newline at end of file
+    logger.info('successfully wrote the schedule to output/schedule.yaml')
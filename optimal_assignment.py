@@ -0,0 +1,144 @@
+from typing import Dict, List, Tuple
+import heapq
+from schedule_codes import NUM_DAYS, NUM_SHIFTS, SHIFT_CAPACITY, parseCapacity
+
+# edge costs: every satisfied preference lowers the cost by one, other slots are free,
+# so the cheapest flow gives the most preferences first and the most shifts second
+PREFERRED_COST = -1
+OTHER_COST = 0
+INFINITY = float('inf')
+
+
+class MinCostFlow:
+    '''
+    successive shortest path min-cost flow with dijkstra on reduced costs
+
+    edges are stored in flat lists, edge e and its reverse edge e ^ 1 are adjacent
+    '''
+    def __init__(self, numNodes: int):
+        self.numNodes = numNodes
+        self.adjacency = [[] for _ in range(numNodes)]
+        self.to = []
+        self.capacity = []
+        self.cost = []
+
+    def addEdge(self, source: int, target: int, capacity: int, cost: int) -> int:
+        '''
+        add an edge and its residual edge, return the edge index
+        '''
+        edge = len(self.to)
+        self.adjacency[source].append(edge)
+        self.to.append(target)
+        self.capacity.append(capacity)
+        self.cost.append(cost)
+        self.adjacency[target].append(edge + 1)
+        self.to.append(source)
+        self.capacity.append(0)
+        self.cost.append(-cost)
+        return edge
+
+    def solve(self, source: int, sink: int, potential: List[int]) -> Tuple[int, int]:
+        '''
+        push flow from source to sink along shortest paths while they do not raise the cost, return (flow, cost)
+
+        the result is the minimum cost flow and the largest flow of that cost, not the maximum flow:
+        a path costing more than zero would trade cost (satisfied preferences) for flow.
+        potential must make every reduced cost of the initial graph non-negative
+        '''
+        to, capacity, cost, adjacency = self.to, self.capacity, self.cost, self.adjacency
+        flow = totalCost = 0
+        while True:
+            distance = [INFINITY] * self.numNodes
+            parentEdge = [-1] * self.numNodes
+            distance[source] = 0
+            queue = [(0, source)]
+            while queue:
+                nodeDistance, node = heapq.heappop(queue)
+                if nodeDistance > distance[node]:
+                    continue
+                if node == sink:
+                    break
+                nodePotential = potential[node] + nodeDistance
+                for edge in adjacency[node]:
+                    if capacity[edge] > 0:
+                        target = to[edge]
+                        candidate = nodePotential + cost[edge] - potential[target]
+                        if candidate < distance[target]:
+                            distance[target] = candidate
+                            parentEdge[target] = edge
+                            heapq.heappush(queue, (candidate, target))
+            if distance[sink] == INFINITY:
+                return flow, totalCost
+
+            sinkDistance = distance[sink]
+            for node in range(self.numNodes):
+                potential[node] += min(distance[node], sinkDistance)
+            # the potentials now differ by the real cost of the shortest path, costs only rise from here
+            if potential[sink] - potential[source] > 0:
+                return flow, totalCost
+
+            push = INFINITY
+            node = sink
+            while node != source:
+                edge = parentEdge[node]
+                push = min(push, capacity[edge])
+                node = to[edge ^ 1]
+            node = sink
+            while node != source:
+                edge = parentEdge[node]
+                capacity[edge] -= push
+                capacity[edge ^ 1] += push
+                totalCost += push * cost[edge]
+                node = to[edge ^ 1]
+            flow += push
+
+
+def solveAssignment(preferenceCodes: Dict[str, List[Tuple[int, int]]], maxWorkDay: int = 5,
+                    capacity=SHIFT_CAPACITY) -> Tuple[Dict[str, List[Tuple[int, int]]], int]:
+    '''
+    return ({name: [(dayCode, shiftCode), ...]}, number of satisfied preferences)
+
+    employees x (day, shift) slots are solved as a min-cost flow:
+    source -> employee (up to min(preferences, maxWorkDay) shifts)
+           -> employee day (one shift per day)
+           -> (day, shift) slot (cost PREFERRED_COST if preferred, OTHER_COST otherwise)
+           -> sink (capacity employees per slot)
+    so the number of satisfied preferences is maximal, then the number of assigned shifts.
+    capacity is an int or a table per (day, shift), see parseCapacity
+    '''
+    names = list(preferenceCodes)
+    numSlots = NUM_DAYS * NUM_SHIFTS
+    # node layout: source, sink, slots, then per employee one node and NUM_DAYS day nodes
+    source, sink, firstSlot = 0, 1, 2
+    firstEmployee = firstSlot + numSlots
+    employeeSize = 1 + NUM_DAYS
+    graph = MinCostFlow(firstEmployee + employeeSize * len(names))
+    potential = [0] * graph.numNodes
+
+    table = parseCapacity(capacity)
+    for slot in range(numSlots):
+        graph.addEdge(firstSlot + slot, sink, table[slot // NUM_SHIFTS][slot % NUM_SHIFTS], 0)
+
+    slotEdges = []
+    for index, name in enumerate(names):
+        preferred = set(day * NUM_SHIFTS + shift for day, shift in preferenceCodes[name])
+        employee = firstEmployee + index * employeeSize
+        graph.addEdge(source, employee, min(len(preferenceCodes[name]), maxWorkDay), 0)
+        for day in range(NUM_DAYS):
+            employeeDay = employee + 1 + day
+            graph.addEdge(employee, employeeDay, 1, 0)
+            for shift in range(NUM_SHIFTS):
+                slot = day * NUM_SHIFTS + shift
+                cost = PREFERRED_COST if slot in preferred else OTHER_COST
+                slotEdges.append((name, day, shift, graph.addEdge(employeeDay, firstSlot + slot, 1, cost)))
+                potential[firstSlot + slot] = min(potential[firstSlot + slot], cost)
+    # the initial graph is a DAG: slots carry the cheapest incoming cost, the sink the cheapest slot
+    potential[sink] = min(potential[firstSlot:firstEmployee], default=0)
+
+    _, totalCost = graph.solve(source, sink, potential)
+
+    assignment = {name: [] for name in names}
+    for name, day, shift, edge in slotEdges:
+        if graph.capacity[edge] == 0:
+            assignment[name].append((day, shift))
+    return assignment, -totalCost
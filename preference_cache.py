@@ -0,0 +1,179 @@
+from typing import Iterable, List, Optional, Tuple
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from schedule_codes import SLOT_CODES
+
+# bump when parsing or the day/shift codes change, older cache files are then never read again
+PARSER_VERSION = 3
+
+# layout (little endian):
+#   header: magic, parser version, number of employees, number of rows, byte length of names, byte length of extra
+#   offsets: uint32 per employee + 1, the rows of employee i are offsets[i]:offsets[i + 1]
+#   day column: uint8 per row, day code
+#   shift column: uint8 per row, shift code
+#   name length column: uint32 per employee, byte length of its name
+#   names: utf-8, one after the other
+#   extra: json {"unknownSlots": [[name, day, shift], ...]}
+CACHE_MAGIC = b'MSPC'
+CACHE_HEADER = struct.Struct('<4sIIIII')
+CACHE_EXTENSION = '.prefs'
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+HASH_CHUNK = 1024 * 1024
+
+
+class PreferenceCache:
+    '''
+    on-disk cache of parsed preference files, keyed by a hash of the file content and PARSER_VERSION
+
+    every entry is one memory-mapped file in directory; reading an entry marks it recently used and
+    the least recently used entries are removed once the directory holds more than maxBytes
+    '''
+    def __init__(self, directory: str = '.schedule_cache', maxBytes: int = DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.maxBytes = maxBytes
+
+    def key(self, filename: str) -> str:
+        '''
+        return the cache key of the file content
+        '''
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(f'{PARSER_VERSION}:{os.path.splitext(filename)[1].lower()}:'.encode())
+        with open(filename, 'rb') as file:
+            for chunk in iter(lambda: file.read(HASH_CHUNK), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, key + CACHE_EXTENSION)
+
+    def load(self, key: str) -> Optional[Tuple[List[Tuple[str, List[Tuple[int, int]]]], list]]:
+        '''
+        return ([(name, codes), ...], unknown slots) of the key, None on a miss
+        '''
+        path = self.path(key)
+        try:
+            with open(path, 'rb') as file:
+                buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+        try:
+            employees, unknown = readEntry(buffer)
+        except ValueError:
+            return None
+        finally:
+            buffer.close()
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return employees, unknown
+
+    def store(self, key: str, employees: Iterable[Tuple[str, List[Tuple[int, int]]]], unknown: list) -> None:
+        '''
+        write the parsed employees and unknown slots under the key, then evict down to maxBytes
+
+        employees may be a generator filling unknown, unknown is written once employees are exhausted
+        '''
+        os.makedirs(self.directory, exist_ok=True)
+        handle, temporary = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(handle, 'wb') as file:
+                writeEntry(file, employees, unknown)
+            os.replace(temporary, self.path(key))
+        except BaseException:
+            os.unlink(temporary)
+            raise
+        self.evict()
+
+    def evict(self) -> None:
+        '''
+        remove the least recently used entries until the cache holds at most maxBytes
+        '''
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(CACHE_EXTENSION):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.maxBytes:
+                break
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+            total -= size
+
+
+def writeEntry(file, employees: Iterable[Tuple[str, List[Tuple[int, int]]]], unknown: list) -> None:
+    '''
+    write the cache layout (see CACHE_HEADER) of the employees to the binary file
+
+    the employees are read once into the columns, so a generator is not held in memory as tuples
+    '''
+    offsets = array('I', [0])
+    days = array('B')
+    shifts = array('B')
+    lengths = array('I')
+    encoded = []
+    for name, codes in employees:
+        days.extend([day for day, _ in codes])
+        shifts.extend([shift for _, shift in codes])
+        offsets.append(len(days))
+        encoded.append(name.encode('utf-8'))
+        lengths.append(len(encoded[-1]))
+    if sys.byteorder == 'big':
+        offsets.byteswap()
+        lengths.byteswap()
+    names = b''.join(encoded)
+    extra = json.dumps({'unknownSlots': unknown}).encode('utf-8')
+
+    file.write(CACHE_HEADER.pack(CACHE_MAGIC, PARSER_VERSION, len(lengths), len(days), len(names), len(extra)))
+    offsets.tofile(file)
+    days.tofile(file)
+    shifts.tofile(file)
+    lengths.tofile(file)
+    file.write(names)
+    file.write(extra)
+
+def readEntry(buffer) -> Tuple[List[Tuple[str, List[Tuple[int, int]]]], list]:
+    '''
+    return ([(name, codes), ...], unknown slots) of a buffer in the cache layout, ValueError if it is not one
+    '''
+    if len(buffer) < CACHE_HEADER.size:
+        raise ValueError('truncated preference cache entry')
+    magic, version, numEmployees, numRows, namesLength, extraLength = CACHE_HEADER.unpack_from(buffer)
+    if magic != CACHE_MAGIC or version != PARSER_VERSION:
+        raise ValueError('not a current preference cache entry')
+    offset = CACHE_HEADER.size
+    end = offset + 4 * (numEmployees + 1) + 2 * numRows + 4 * numEmployees + namesLength + extraLength
+    if len(buffer) != end:
+        raise ValueError('truncated preference cache entry')
+
+    offsets = array('I', buffer[offset:offset + 4 * (numEmployees + 1)])
+    offset += 4 * (numEmployees + 1)
+    days = buffer[offset:offset + numRows]
+    offset += numRows
+    shifts = buffer[offset:offset + numRows]
+    offset += numRows
+    lengths = array('I', buffer[offset:offset + 4 * numEmployees])
+    offset += 4 * numEmployees
+    if sys.byteorder == 'big':
+        offsets.byteswap()
+        lengths.byteswap()
+    names = []
+    for length in lengths:
+        names.append(buffer[offset:offset + length].decode('utf-8'))
+        offset += length
+    extra = json.loads(buffer[offset:offset + extraLength])
+
+    slots = list(map(SLOT_CODES.__getitem__, days))
+    codes = [slot[shift] for slot, shift in zip(slots, shifts)]
+    employees = [(names[index], codes[offsets[index]:offsets[index + 1]]) for index in range(numEmployees)]
+    return employees, [tuple(slot) for slot in extra['unknownSlots']]
@@ -0,0 +1,185 @@
+from typing import Iterator, List, Optional, Tuple
+import itertools
+import json
+import os
+import yaml
+from yaml.events import (ScalarEvent, SequenceStartEvent, SequenceEndEvent,
+                         MappingStartEvent, MappingEndEvent, AliasEvent)
+from schedule_codes import SLOT_CODES, parseDay, parseShift
+
+try:
+    # libyaml parser, much faster than the pure python one
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
+JSON_LINES_EXTENSIONS = ('.jsonl', '.ndjson')
+SECTIONS = ('employees', 'sites')
+
+
+def iterEmployees(filename: str, unknown: Optional[list] = None) -> Iterator[Tuple[str, List[Tuple[int, int]]]]:
+    '''
+    yield (name, [(dayCode, shiftCode), ...]) for each employee of a preference file
+
+    the file is either the yaml format of input/preference_schedule.yaml or
+    json lines with one employee per line, e.g.
+    {"name": "Bob", "preferences": [{"day": "Mon", "time": "morning"}]}
+
+    see parseEmployee for unknown
+    '''
+    if filename.endswith(JSON_LINES_EXTENSIONS):
+        return iterJsonLines(filename, unknown)
+    return iterYaml(filename, unknown)
+
+def iterYaml(filename: str, unknown: Optional[list] = None) -> Iterator[Tuple[str, List[Tuple[int, int]]]]:
+    '''
+    walk the employees sequence of a yaml preference file one employee at a time
+
+    only one employee is built in memory at a time, the rest of the document is
+    consumed as parser events
+    '''
+    for employee in iterSection(filename, 'employees'):
+        yield parseEmployee(employee, unknown)
+
+def iterSites(filename: str) -> Iterator[Tuple[str, object]]:
+    '''
+    yield (site name, employees) of a multi-site yaml file, one site at a time, e.g.
+
+    sites:
+      - name: store 1
+        employees: [...]
+
+    a site which is not a mapping with a name and an employees list is yielded as
+    (file#position, ValueError) and the next sites still follow; a yaml error is yielded
+    the same way for the site it is in, the sites after it cannot be read
+    '''
+    label = os.path.basename(filename)
+    sites = iterSection(filename, 'sites')
+    for position in itertools.count(1):
+        try:
+            site = next(sites)
+        except StopIteration:
+            return
+        except Exception as error:
+            yield f'{label}#{position}', error
+            return
+        if not isinstance(site, dict) or 'name' not in site:
+            yield f'{label}#{position}', ValueError(f'site {position} has no name')
+            continue
+        employees = site.get('employees') or []
+        if not isinstance(employees, list):
+            yield f'{label}#{position}', ValueError(f'site {site["name"]}: employees must be a list')
+            continue
+        yield str(site['name']), employees
+
+def findSection(filename: str) -> Optional[str]:
+    '''
+    return the first top-level list of a yaml file, 'employees' or 'sites', without reading the rest
+    '''
+    for key, _ in iterTopLevel(filename, SECTIONS):
+        return key
+    return None
+
+def iterSection(filename: str, section: str) -> Iterator:
+    '''
+    yield the items of a top-level yaml list one at a time
+    '''
+    for key, items in iterTopLevel(filename, (section,)):
+        yield from items
+        return
+
+def iterTopLevel(filename: str, sections: Tuple[str, ...]) -> Iterator[Tuple[str, Iterator]]:
+    '''
+    yield (key, item iterator) for every top-level list named in sections, other keys are skipped
+    '''
+    anchors = {}
+    with open(filename, 'rb') as file:
+        events = yaml.parse(file, Loader=SafeLoader)
+        for event in events:
+            if isinstance(event, MappingStartEvent):
+                break
+        else:
+            return
+
+        for event in events:
+            if isinstance(event, MappingEndEvent):
+                return
+            key = buildValue(event, events, anchors)
+            valueEvent = next(events)
+            if key not in sections:
+                buildValue(valueEvent, events, anchors)
+                continue
+            if not isinstance(valueEvent, SequenceStartEvent):
+                raise ValueError(f'{filename}: {key} must be a list')
+            items = iterItems(events, anchors)
+            yield key, items
+            for _ in items:
+                pass
+
+def iterItems(events: Iterator, anchors: dict) -> Iterator:
+    '''
+    yield the built items of a sequence whose start event was consumed
+    '''
+    for itemEvent in events:
+        if isinstance(itemEvent, SequenceEndEvent):
+            return
+        yield buildValue(itemEvent, events, anchors)
+
+def iterJsonLines(filename: str, unknown: Optional[list] = None) -> Iterator[Tuple[str, List[Tuple[int, int]]]]:
+    '''
+    yield the employees of a json lines preference file, one employee per line
+    '''
+    with open(filename, 'r') as file:
+        for line in file:
+            if line.strip():
+                yield parseEmployee(json.loads(line), unknown)
+
+def buildValue(event, events, anchors: dict):
+    '''
+    build the python value starting at event, scalars are kept as strings
+
+    anchored values are kept in anchors for later aliases
+    '''
+    if isinstance(event, AliasEvent):
+        if event.anchor not in anchors:
+            raise ValueError(f'unknown yaml alias: *{event.anchor}')
+        return anchors[event.anchor]
+    if isinstance(event, ScalarEvent):
+        value = event.value
+    elif isinstance(event, SequenceStartEvent):
+        value = []
+        for itemEvent in events:
+            if isinstance(itemEvent, SequenceEndEvent):
+                break
+            value.append(buildValue(itemEvent, events, anchors))
+    elif isinstance(event, MappingStartEvent):
+        value = {}
+        for keyEvent in events:
+            if isinstance(keyEvent, MappingEndEvent):
+                break
+            key = buildValue(keyEvent, events, anchors)
+            value[key] = buildValue(next(events), events, anchors)
+    else:
+        raise ValueError(f'unexpected yaml event: {event}')
+    if event.anchor is not None:
+        anchors[event.anchor] = value
+    return value
+
+def parseEmployee(employee: dict, unknown: Optional[list] = None) -> Tuple[str, List[Tuple[int, int]]]:
+    '''
+    return (name, [(dayCode, shiftCode), ...]) of one employee entry
+
+    raise ValueError naming the employee if a day or shift is invalid, or when unknown is a list,
+    leave the slot out and append (NAME, day, time) to unknown, the name upper-cased like the loaded employees
+    '''
+    name = str(employee['name'])
+    codes = []
+    for slot in employee.get('preferences') or ():
+        day, shift = slot.get('day'), slot.get('time')
+        try:
+            codes.append(SLOT_CODES[parseDay(day)][parseShift(shift)])
+        except ValueError as error:
+            if unknown is None:
+                raise ValueError(f'employee {name}: {error}') from None
+            unknown.append((name.upper(), day, shift))
+    return name, codes
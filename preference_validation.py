@@ -0,0 +1,74 @@
+from typing import Dict, List, Tuple
+from schedule_codes import DAY_NAMES
+
+
+class ValidationReport:
+    '''
+    every problem of a roster found by validateCodes and while loading it
+
+    duplicateDays: [(name, day), ...] days an employee prefers more than once
+    overMaxWorkDay: [(name, preferred days), ...] employees preferring more than maxWorkDay days
+    unknownSlots: [(name, day, shift), ...] preferences with an unknown day or shift token
+    duplicateNames: [name, ...] employees listed more than once, only the first entry is kept
+    '''
+    def __init__(self, maxWorkDay: int):
+        self.maxWorkDay = maxWorkDay
+        self.duplicateDays = []
+        self.overMaxWorkDay = []
+        self.unknownSlots = []
+        self.duplicateNames = []
+
+    @property
+    def ok(self) -> bool:
+        return not (self.duplicateDays or self.overMaxWorkDay or self.unknownSlots or self.duplicateNames)
+
+    def toDict(self) -> dict:
+        return {
+            'maxWorkDay': self.maxWorkDay,
+            'duplicateDays': self.duplicateDays,
+            'overMaxWorkDay': self.overMaxWorkDay,
+            'unknownSlots': self.unknownSlots,
+            'duplicateNames': self.duplicateNames,
+        }
+
+    def __str__(self) -> str:
+        return (f'{len(self.duplicateDays)} duplicate days, {len(self.overMaxWorkDay)} employees over '
+                f'{self.maxWorkDay} days, {len(self.unknownSlots)} unknown day/shift tokens, '
+                f'{len(self.duplicateNames)} duplicate names')
+
+
+class PreferenceValidationError(ValueError):
+    '''
+    raised by strict validation, report holds every problem
+    '''
+    def __init__(self, report: ValidationReport):
+        super().__init__(f'invalid preferences: {report}')
+        self.report = report
+
+
+def validateCodes(preferenceCodes: Dict[str, List[Tuple[int, int]]], maxWorkDay: int,
+                  report: ValidationReport) -> Dict[str, List[Tuple[int, int]]]:
+    '''
+    add the duplicate days and over maxWorkDay employees to report in one pass over the codes
+
+    return {name: codes} of the employees with a problem, without their bad entries: the first
+    preference of each day and at most maxWorkDay of them are kept
+    '''
+    cleaned = {}
+    duplicateDays = report.duplicateDays
+    for name, codes in preferenceCodes.items():
+        if len(codes) <= maxWorkDay and len({day for day, _ in codes}) == len(codes):
+            continue
+        days = 0
+        kept = []
+        for day, shift in codes:
+            if days >> day & 1:
+                duplicateDays.append((name, DAY_NAMES[day]))
+                continue
+            days |= 1 << day
+            kept.append((day, shift))
+        if len(kept) > maxWorkDay:
+            report.overMaxWorkDay.append((name, len(kept)))
+            kept = kept[:maxWorkDay]
+        cleaned[name] = kept
+    return cleaned
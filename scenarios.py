@@ -0,0 +1,160 @@
+'''
+compare staffing scenarios on one roster
+
+    python scenarios.py input/preference_schedule.yaml --max-work-day 4 5 \
+        --capacity base=2 weekend3='{"Sat": 3, "Sun": 3}' --workers 4
+
+the preference file is loaded and parsed once, every scenario (a capacity table and a
+maxWorkDay) is scheduled from a copy of the loaded roster (ManageSchedule.copyPreferences)
+and the results are printed as one comparison table.
+'''
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional
+import argparse
+import json
+import logging
+import sys
+import time
+from manage_employee_schedule import ManageSchedule, STRATEGIES
+from preference_cache import PreferenceCache
+from schedule_codes import parseCapacity
+
+COLUMNS = ('scenario', 'capacity', 'maxWorkDay', 'slots', 'assigned', 'coverage', 'preferences', 'droppedPreferences',
+           'satisfied', 'satisfaction', 'unfilledSlots', 'maxLoad', 'seconds')
+
+# roster of the worker processes, set once per process by setSharedRoster
+sharedRoster = None
+
+
+def scenarioGrid(capacities: Dict[str, object], maxWorkDays: Iterable[int]) -> List[dict]:
+    '''
+    return every combination of the named capacities (see parseCapacity) and maxWorkDays as
+    [{'scenario', 'capacity', 'table', 'maxWorkDay'}, ...]
+    '''
+    tables = {label: parseCapacity(capacity) for label, capacity in capacities.items()}
+    return [{'scenario': f'{label}/{maxWorkDay}', 'capacity': label, 'table': table, 'maxWorkDay': maxWorkDay}
+            for label, table in tables.items() for maxWorkDay in maxWorkDays]
+
+def loadRoster(filename: str, cache: Optional[PreferenceCache] = None) -> ManageSchedule:
+    '''
+    return an unassigned schedule with the preferences of the file
+    '''
+    roster = ManageSchedule(filename)
+    roster.getPreference(filename, cache)
+    return roster
+
+def evaluateScenario(roster: ManageSchedule, scenario: dict, strategy: str = 'greedy', seed: Optional[int] = 0,
+                     improveSeconds: Optional[float] = None) -> dict:
+    '''
+    schedule a copy of the loaded roster under the scenario and return its row of COLUMNS
+
+    preferences are counted as loaded, so satisfaction has the same denominator in every scenario;
+    droppedPreferences are the ones validation left out for the maxWorkDay of the scenario
+    '''
+    start = time.perf_counter()
+    schedule = roster.copyPreferences(scenario['scenario'], scenario['table'])
+    schedule.assignShift(maxWorkDay=scenario['maxWorkDay'], strategy=strategy, seed=seed, improveSeconds=improveSeconds)
+    slots = sum(map(sum, schedule.capacity))
+    assigned = sum(map(sum, schedule.shiftCounts))
+    preferences = sum(len(codes) for codes in roster.preferenceCodes.values())
+    satisfied = schedule.countSatisfiedPreferences()
+    return {
+        'scenario': scenario['scenario'],
+        'capacity': scenario['capacity'],
+        'maxWorkDay': scenario['maxWorkDay'],
+        'slots': slots,
+        'assigned': assigned,
+        'coverage': assigned / slots if slots else 1.0,
+        'preferences': preferences,
+        'droppedPreferences': preferences - sum(len(codes) for codes in schedule.preferenceCodes.values()),
+        'satisfied': satisfied,
+        'satisfaction': satisfied / preferences if preferences else 1.0,
+        'unfilledSlots': schedule.countUnfilledSlots(),
+        'maxLoad': max(map(len, schedule.employeeSchedule.values()), default=0),
+        'seconds': time.perf_counter() - start,
+    }
+
+def setSharedRoster(roster: ManageSchedule) -> None:
+    global sharedRoster
+    sharedRoster = roster
+
+def evaluateShared(scenario: dict, strategy: str, seed: Optional[int], improveSeconds: Optional[float]) -> dict:
+    '''
+    evaluateScenario on the roster of the worker process
+    '''
+    return evaluateScenario(sharedRoster, scenario, strategy, seed, improveSeconds)
+
+def evaluateScenarios(roster: ManageSchedule, scenarios: List[dict], strategy: str = 'greedy', seed: Optional[int] = 0,
+                      improveSeconds: Optional[float] = None, workers: Optional[int] = 1) -> List[dict]:
+    '''
+    return the rows of evaluateScenario for every scenario, in order
+
+    with workers other than 1 the scenarios run on a process pool (None: one process per cpu);
+    the roster is sent once to each process, not once per scenario
+    '''
+    options = (strategy, seed, improveSeconds)
+    if workers is not None and workers <= 1:
+        return [evaluateScenario(roster, scenario, *options) for scenario in scenarios]
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=setSharedRoster, initargs=(roster,)) as executor:
+        futures = [executor.submit(evaluateShared, scenario, *options) for scenario in scenarios]
+        return [future.result() for future in futures]
+
+def formatTable(rows: List[dict]) -> str:
+    '''
+    return the rows as an aligned text table of COLUMNS
+    '''
+    cells = [list(COLUMNS)]
+    for row in rows:
+        cells.append([f'{row[column]:.1%}' if column in ('coverage', 'satisfaction')
+                      else f'{row[column]:.3f}' if column == 'seconds' else str(row[column]) for column in COLUMNS])
+    widths = [max(len(line[index]) for line in cells) for index in range(len(COLUMNS))]
+    return '\n'.join('  '.join(cell.rjust(width) for cell, width in zip(line, widths)) for line in cells)
+
+def parseCapacityOption(option: str):
+    '''
+    return (label, capacity) of a LABEL=JSON option, JSON is an int, rows per day or a dict of days
+    or 'day shift' strings, e.g. weekend='{"Sat": 3, "Sun evening": 4}'
+    '''
+    label, separator, value = option.partition('=')
+    if not separator or not label:
+        raise argparse.ArgumentTypeError(f'expected LABEL=CAPACITY: {option}')
+    try:
+        capacity = json.loads(value)
+        parseCapacity(capacity)
+    except ValueError as error:
+        raise argparse.ArgumentTypeError(f'invalid capacity {option}: {error}') from None
+    return label, capacity
+
+def parseArguments(argv: List[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='compare capacity and maximum work day scenarios on one roster')
+    parser.add_argument('input', help='preference file')
+    parser.add_argument('--capacity', nargs='+', type=parseCapacityOption, default=[('default', 2)],
+                        help='LABEL=CAPACITY scenarios, see parseCapacityOption (default: default=2)')
+    parser.add_argument('--max-work-day', nargs='+', type=int, default=[5], help='maximum shifts per employee (default: 5)')
+    parser.add_argument('--strategy', choices=STRATEGIES, default='greedy')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the under staffed fill (default: 0)')
+    parser.add_argument('--improve-seconds', type=float, default=None,
+                        help='improve every schedule by local search for this many seconds')
+    parser.add_argument('--workers', type=int, default=1, help='number of processes (default: 1)')
+    parser.add_argument('--cache-dir', default=None, help='cache parsed preference files in this directory')
+    parser.add_argument('--json', action='store_true', help='print the rows as json lines instead of a table')
+    return parser.parse_args(argv)
+
+def main(argv: List[str] = None) -> int:
+    arguments = parseArguments(argv)
+    logging.basicConfig(level=logging.ERROR)
+    roster = loadRoster(arguments.input, PreferenceCache(arguments.cache_dir) if arguments.cache_dir else None)
+    scenarios = scenarioGrid(dict(arguments.capacity), arguments.max_work_day)
+    rows = evaluateScenarios(roster, scenarios, arguments.strategy, arguments.seed, arguments.improve_seconds,
+                             arguments.workers)
+    if arguments.json:
+        for row in rows:
+            print(json.dumps(row))
+    else:
+        print(formatTable(rows))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,111 @@
+from typing import List, Tuple
+from enum import Enum
+
+
+class Shift(Enum):
+    MORNING = 0
+    AFTERNOON = 1
+    EVENING = 2
+
+class Day(Enum):
+    MONDAY = 1
+    TUESDAY = 2
+    WEDNESDAY = 3
+    THURSDAY = 4
+    FRIDAY = 5
+    SATURDAY = 6
+    SUNDAY = 7
+
+NUM_DAYS = len(Day)
+NUM_SHIFTS = len(Shift)
+
+# bitmask with every day code set
+ALL_DAYS = (1 << NUM_DAYS) - 1
+
+# default maximum number of employees per shift, see parseCapacity for tables per (day, shift)
+SHIFT_CAPACITY = 2
+
+# day code = Day.value - 1, so MONDAY is 0 and SUNDAY is 6
+DAY_NAMES = tuple(day.name for day in Day)
+SHIFT_NAMES = tuple(shift.name for shift in Shift)
+
+# accepted spellings, e.g. 'Mon', 'MONDAY', 'tue', 'Tuesday'
+DAY_CODES = {}
+for day in Day:
+    DAY_CODES[day.name] = day.value - 1
+    DAY_CODES[day.name[:3]] = day.value - 1
+SHIFT_CODES = {shift.name: shift.value for shift in Shift}
+
+# NEXT_DAYS[d] is the wrap-around order of the other six days after day d
+NEXT_DAYS = tuple(tuple((day + offset) % NUM_DAYS for offset in range(1, NUM_DAYS)) for day in range(NUM_DAYS))
+
+# shared (day, shift) tuples so every stored slot is a reference, not a new object
+SLOT_CODES = tuple(tuple((day, shift) for shift in range(NUM_SHIFTS)) for day in range(NUM_DAYS))
+SLOT_NAMES = tuple(tuple((DAY_NAMES[day], SHIFT_NAMES[shift]) for shift in range(NUM_SHIFTS)) for day in range(NUM_DAYS))
+
+
+def parseDay(day: str) -> int:
+    '''
+    return the day code (0 = monday ... 6 = sunday) of a day string
+
+    e.g. 'Mon', 'monday' and 'MONDAY' all return 0
+    '''
+    try:
+        return DAY_CODES[day.upper()]
+    except (KeyError, AttributeError):
+        raise ValueError(f'invalid day: {day}') from None
+
+def parseShift(shift: str) -> int:
+    '''
+    return the shift code (0 = morning, 1 = afternoon, 2 = evening) of a shift string
+    '''
+    try:
+        return SHIFT_CODES[shift.upper()]
+    except (KeyError, AttributeError):
+        raise ValueError(f'invalid shift: {shift}') from None
+
+def parseCapacity(capacity=SHIFT_CAPACITY) -> Tuple[Tuple[int, ...], ...]:
+    '''
+    return the capacity table [day code][shift code] of a capacity, which is one of
+
+    an int for every shift, e.g. 3
+    rows of NUM_SHIFTS ints per day code, e.g. [[2, 2, 2], ..., [3, 3, 3]]
+    a dict of day strings or (day, shift) tuples or 'day shift' strings to an int or a row, the other
+    shifts keep SHIFT_CAPACITY, e.g. {'Sat': 3, 'Sun': [2, 3, 3], ('Fri', 'evening'): 4, 'Thu morning': 3}
+    '''
+    if isinstance(capacity, int):
+        table = [[capacity] * NUM_SHIFTS for _ in range(NUM_DAYS)]
+    elif isinstance(capacity, dict):
+        table = [[SHIFT_CAPACITY] * NUM_SHIFTS for _ in range(NUM_DAYS)]
+        for key, value in capacity.items():
+            if isinstance(key, str) and len(key.split()) == 2:
+                key = tuple(key.split())
+            if isinstance(key, (tuple, list)):
+                day, shift = key
+                if not isinstance(value, int):
+                    raise ValueError(f'invalid capacity of {day} {shift}: {value}')
+                table[parseDay(day)][parseShift(shift)] = value
+            else:
+                table[parseDay(key)] = parseCapacityRow(value)
+    elif isinstance(capacity, (list, tuple)):
+        table = [parseCapacityRow(row) for row in capacity]
+        if len(table) != NUM_DAYS:
+            raise ValueError(f'capacity needs {NUM_DAYS} days, got {len(table)}')
+    else:
+        raise ValueError(f'invalid capacity: {capacity}')
+    if any(value < 0 for row in table for value in row):
+        raise ValueError(f'negative capacity: {capacity}')
+    return tuple(tuple(row) for row in table)
+
+def parseCapacityRow(row) -> List[int]:
+    '''
+    return the capacity of each shift of one day, from an int or NUM_SHIFTS ints
+    '''
+    if isinstance(row, int):
+        return [row] * NUM_SHIFTS
+    if not isinstance(row, (list, tuple)):
+        raise ValueError(f'invalid capacity row: {row}')
+    row = list(row)
+    if len(row) != NUM_SHIFTS or not all(isinstance(value, int) for value in row):
+        raise ValueError(f'invalid capacity row: {row}')
+    return row
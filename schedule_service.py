@@ -0,0 +1,309 @@
+'''
+long-running schedule service, json lines over a unix socket or localhost tcp
+
+    python schedule_service.py --socket /tmp/schedule.sock --workers 4
+    python schedule_service.py --port 8765
+
+every request is one json line and gets one json line back with the same id, e.g.
+
+    {"id": 1, "site": "store 1", "employees": [{"name": "Bob", "preferences": [{"day": "Mon", "time": "morning"}]}],
+     "maxWorkDay": 5, "strategy": "greedy", "seed": 0}
+    {"id": 1, "site": "store 1", "schedule": {"BOB": [["MONDAY", "MORNING"]]}, "satisfied": 1, "unfilledSlots": 41,
+     "coalesced": false, "seconds": 0.002, "error": null}
+
+optional request keys are capacity (see parseCapacity), strict and improveSeconds. {"id": 2, "op": "stats"}
+returns the request counters and the p50/p99 latency. Requests of one connection are handled concurrently
+and answered as they finish. Identical requests for a site that arrive while it is being solved share that
+solve, solves run on a process pool so the event loop keeps serving. Requests longer than INLINE_REQUEST_BYTES
+are also decoded and keyed on a separate pool and responses are encoded by the workers, so a large roster does not
+hold up the event loop either. See service_client for a client and load test.
+'''
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple, Union
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import os
+import sys
+import time
+from manage_employee_schedule import ManageSchedule
+from schedule_codes import SHIFT_CAPACITY
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORT = 8765
+# longest request line, a roster of about a hundred thousand employees
+MAX_REQUEST_BYTES = 64 * 1024 * 1024
+# latencies kept for the percentiles
+LATENCY_HISTORY = 10000
+# longer request lines are decoded and keyed by the decoder processes, shorter ones (a few ms) on the event loop
+INLINE_REQUEST_BYTES = 64 * 1024
+# processes decoding long request lines, they only parse and hash
+DECODE_WORKERS = 2
+# request keys copied into the response, the rest is only read by the solve
+HEADER_KEYS = ('id', 'op', 'site')
+
+
+def solveRequest(request: dict) -> dict:
+    '''
+    schedule the employees of a request, run by the worker processes
+    '''
+    schedule = ManageSchedule(str(request.get('site', 'schedule')), capacity=request.get('capacity', SHIFT_CAPACITY))
+    schedule.loadEmployees(request.get('employees') or [])
+    schedule.assignShift(maxWorkDay=request.get('maxWorkDay', 5), strategy=request.get('strategy', 'greedy'),
+                         seed=request.get('seed', 0), strict=request.get('strict', False),
+                         improveSeconds=request.get('improveSeconds'))
+    return {
+        'schedule': {name: [list(slot) for slot in slots] for name, slots in schedule.employeeSchedule.items()},
+        'satisfied': schedule.countSatisfiedPreferences(),
+        'unfilledSlots': schedule.countUnfilledSlots(),
+    }
+
+def solveJob(job: Union[dict, bytes]) -> bytes:
+    '''
+    solveRequest of a request or of a request line still to decode, return the result encoded as json
+    '''
+    request = json.loads(job) if isinstance(job, bytes) else job
+    return json.dumps(solveRequest(request)).encode()
+
+def decodeRequest(line: bytes) -> Tuple[dict, str]:
+    '''
+    return (HEADER_KEYS of the request, requestKey) of a request line, ValueError if it is not a json object
+    '''
+    request = json.loads(line)
+    if not isinstance(request, dict):
+        raise ValueError('request must be a json object')
+    return {key: request[key] for key in HEADER_KEYS if key in request}, requestKey(request)
+
+def warmWorker() -> None:
+    '''
+    import and run the scheduler once in a new worker process so the first request does not pay for it
+    '''
+    solveRequest({'employees': [{'name': 'warm', 'preferences': [{'day': 'Mon', 'time': 'morning'}]}]})
+
+def ping() -> int:
+    '''
+    no-op submitted once per worker so start() spawns and warms every worker before the first request,
+    return the process id
+    '''
+    return os.getpid()
+
+def requestKey(request: dict) -> str:
+    '''
+    return the coalescing key of a request, the same for requests differing only by id
+    '''
+    payload = {key: value for key, value in request.items() if key != 'id'}
+    return hashlib.blake2b(json.dumps(payload, sort_keys=True).encode(), digest_size=16).hexdigest()
+
+def percentile(values: List[float], fraction: float) -> Optional[float]:
+    '''
+    return the nearest-rank percentile of the values, None if there are none
+    '''
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(math.ceil(fraction * len(ordered)) - 1, 0)]
+
+
+class ScheduleService:
+    '''
+    asyncio server handing schedule requests to a process pool
+
+    inFlight: {request key: future} of the solves running now, later identical requests await the same future
+    connections: tasks of the open connections, cancelled by close()
+    latencies: seconds from reading to answering the last LATENCY_HISTORY requests
+    '''
+    def __init__(self, workers: Optional[int] = None):
+        self.workers = workers
+        self.executor = None
+        self.decoder = None
+        self.server = None
+        self.inFlight = {}
+        self.connections = set()
+        self.latencies = deque(maxlen=LATENCY_HISTORY)
+        self.counters = {'requests': 0, 'solves': 0, 'coalesced': 0, 'errors': 0}
+
+    async def start(self, path: Optional[str] = None, host: str = '127.0.0.1', port: int = DEFAULT_PORT) -> None:
+        '''
+        start and warm the worker processes, then listen on the unix socket path, or on host:port without one
+        '''
+        workers = self.workers or os.cpu_count() or 1
+        self.executor = ProcessPoolExecutor(max_workers=workers, initializer=warmWorker)
+        # the pool spawns workers on submit, one no-op per worker starts them all now
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self.executor, ping) for _ in range(workers)))
+        self.decoder = ProcessPoolExecutor(max_workers=DECODE_WORKERS)
+        if path is not None:
+            if os.path.exists(path):
+                os.unlink(path)
+            self.server = await asyncio.start_unix_server(self.handleConnection, path, limit=MAX_REQUEST_BYTES)
+        else:
+            self.server = await asyncio.start_server(self.handleConnection, host, port, limit=MAX_REQUEST_BYTES)
+        logger.info('listening on %s', path or f'{host}:{self.port}')
+
+    @property
+    def port(self) -> Optional[int]:
+        sockets = self.server.sockets if self.server is not None else ()
+        if sockets and isinstance(sockets[0].getsockname(), tuple):
+            return sockets[0].getsockname()[1]
+        return None
+
+    async def close(self) -> None:
+        '''
+        stop listening, cancel the open connections and shut the worker processes down off the event loop
+        '''
+        if self.server is not None:
+            self.server.close()
+        connections = list(self.connections)
+        for task in connections:
+            task.cancel()
+        await asyncio.gather(*connections, return_exceptions=True)
+        if self.server is not None:
+            await self.server.wait_closed()
+        for executor in (self.executor, self.decoder):
+            if executor is not None:
+                await asyncio.get_running_loop().run_in_executor(None, executor.shutdown)
+
+    async def handleConnection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        '''
+        read request lines until the client closes, every request is answered by its own task
+        '''
+        connection = asyncio.current_task()
+        self.connections.add(connection)
+        tasks = set()
+        lock = asyncio.Lock()
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (ValueError, asyncio.LimitOverrunError):
+                    await self.reply(writer, lock, {'id': None, 'error': f'request longer than {MAX_REQUEST_BYTES} bytes'})
+                    break
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                task = asyncio.ensure_future(self.answer(line, writer, lock, time.perf_counter()))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+        except ConnectionError:
+            pass
+        except asyncio.CancelledError:
+            # cancelled by close(), the stream callback logs a handler that ends cancelled as an error
+            pass
+        finally:
+            for task in tasks:
+                task.cancel()
+            self.connections.discard(connection)
+            writer.close()
+
+    async def answer(self, line: bytes, writer: asyncio.StreamWriter, lock: asyncio.Lock, start: float) -> None:
+        try:
+            if len(line) > INLINE_REQUEST_BYTES:
+                header, key = await asyncio.get_running_loop().run_in_executor(self.decoder, decodeRequest, line)
+                job = line
+            else:
+                job = json.loads(line)
+                if not isinstance(job, dict):
+                    raise ValueError('request must be a json object')
+                header, key = {name: job[name] for name in HEADER_KEYS if name in job}, requestKey(job)
+        except ValueError as error:
+            self.counters['errors'] += 1
+            await self.reply(writer, lock, {'id': None, 'error': f'invalid request: {error}'})
+            return
+        response, result = await self.handleRequest(header, key, job)
+        response['seconds'] = time.perf_counter() - start
+        if header.get('op') != 'stats':
+            self.latencies.append(response['seconds'])
+        await self.reply(writer, lock, response, result)
+
+    async def reply(self, writer: asyncio.StreamWriter, lock: asyncio.Lock, response: dict,
+                    result: Optional[bytes] = None) -> None:
+        '''
+        write the response line, with the members of the encoded result appended
+        '''
+        line = json.dumps(response).encode()
+        if result is not None:
+            line = line[:-1] + b', ' + result[1:]
+        async with lock:
+            writer.write(line + b'\n')
+            await writer.drain()
+
+    async def handleRequest(self, header: dict, key: str, job: Union[dict, bytes]) -> Tuple[dict, Optional[bytes]]:
+        '''
+        return (response without its seconds, encoded result of solveJob or None) of a decoded request,
+        header holds its HEADER_KEYS and job is the request or its line (see solveJob)
+        '''
+        if header.get('op') == 'stats':
+            return {'id': header.get('id'), **self.getStats()}, None
+        self.counters['requests'] += 1
+        response = {'id': header.get('id'), 'site': header.get('site'), 'coalesced': False, 'error': None}
+        result = None
+        try:
+            result, response['coalesced'] = await self.schedule(key, job)
+        except Exception as error:
+            self.counters['errors'] += 1
+            response['error'] = f'{type(error).__name__}: {error}'
+        return response, result
+
+    async def schedule(self, key: str, job: Union[dict, bytes]) -> Tuple[bytes, bool]:
+        '''
+        return (result of solveJob, true if it came from a solve already running) of the request with the key
+        '''
+        future = self.inFlight.get(key)
+        if future is not None:
+            self.counters['coalesced'] += 1
+            return await asyncio.shield(future), True
+
+        future = asyncio.get_running_loop().run_in_executor(self.executor, solveJob, job)
+        self.inFlight[key] = future
+        self.counters['solves'] += 1
+        try:
+            return await asyncio.shield(future), False
+        finally:
+            if self.inFlight.get(key) is future:
+                del self.inFlight[key]
+
+    def getStats(self) -> Dict[str, object]:
+        '''
+        return the counters, the requests being solved and the p50/p99 latency in seconds
+        '''
+        latencies = list(self.latencies)
+        return {**self.counters, 'inFlight': len(self.inFlight),
+                'p50': percentile(latencies, 0.5), 'p99': percentile(latencies, 0.99)}
+
+
+async def serve(path: Optional[str], host: str, port: int, workers: Optional[int]) -> None:
+    service = ScheduleService(workers)
+    await service.start(path, host, port)
+    try:
+        await service.server.serve_forever()
+    finally:
+        await service.close()
+
+def parseArguments(argv: List[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='serve schedules over a unix socket or localhost tcp')
+    parser.add_argument('--socket', default=None, help='unix socket path, tcp is used without one')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--workers', type=int, default=None, help='number of solver processes (default: number of cpus)')
+    return parser.parse_args(argv)
+
+def main(argv: List[str] = None) -> int:
+    arguments = parseArguments(argv)
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(serve(arguments.socket, arguments.host, arguments.port, arguments.workers))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,42 @@
+from contextlib import contextmanager
+import json
+import time
+
+PHASES = ('load', 'validate', 'preferences', 'sameDayFallback', 'nextDayFallback', 'fill', 'improve', 'write')
+COUNTERS = ('preferencesHonored', 'sameDayFallbacks', 'nextDayFallbacks', 'unassignedPreferences',
+            'randomFills', 'unfilledSlots')
+
+
+class ScheduleStats:
+    '''
+    wall time per phase and counters of one ManageSchedule
+
+    seconds: {phase: seconds} of PHASES, the fallback phases are part of preferences
+    counters: {counter: number} of COUNTERS
+    '''
+    def __init__(self):
+        self.seconds = dict.fromkeys(PHASES, 0.0)
+        self.counters = dict.fromkeys(COUNTERS, 0)
+
+    @contextmanager
+    def phase(self, name: str):
+        '''
+        add the wall time of the with block to the phase
+        '''
+        start = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.seconds[name] += time.perf_counter() - start
+
+    def addTime(self, name: str, seconds: float) -> None:
+        self.seconds[name] += seconds
+
+    def count(self, name: str, number: int = 1) -> None:
+        self.counters[name] += number
+
+    def toDict(self) -> dict:
+        return {'seconds': dict(self.seconds), 'counters': dict(self.counters)}
+
+    def toJson(self, **kwargs) -> str:
+        return json.dumps(self.toDict(), **kwargs)
@@ -0,0 +1,181 @@
+from typing import Dict, List, Tuple, TextIO
+import json
+import mmap
+import os
+import re
+import struct
+import sys
+from array import array
+from schedule_codes import DAY_CODES, SHIFT_CODES, DAY_NAMES, SHIFT_NAMES
+import yaml
+
+FORMATS = ('yaml', 'json', 'jsonl', 'binary')
+EXTENSION_FORMATS = {'.yaml': 'yaml', '.yml': 'yaml', '.json': 'json', '.jsonl': 'jsonl', '.ndjson': 'jsonl', '.bin': 'binary'}
+
+# binary layout (little endian):
+#   header: magic, version, number of employees, number of rows, byte length of names
+#   employee column: uint32 per row, index into names
+#   day column: uint8 per row, day code
+#   shift column: uint8 per row, shift code
+#   name length column: uint32 per employee, byte length of its name
+#   names: utf-8, one after the other
+BINARY_MAGIC = b'MSCH'
+BINARY_VERSION = 2
+BINARY_HEADER = struct.Struct('<4sIIII')
+
+PLAIN_NAME = re.compile(r'[A-Za-z][A-Za-z0-9_.-]*( [A-Za-z0-9_.-]+)*')
+YAML_RESOLVER = yaml.resolver.Resolver()
+
+
+def formatFromFilename(filename: str) -> str:
+    '''
+    return the output format of a filename extension, yaml if the extension is unknown
+    '''
+    return EXTENSION_FORMATS.get(os.path.splitext(filename)[1].lower(), 'yaml')
+
+def writeSchedule(schedule: Dict[str, List[Tuple[str, str]]], filename: str, format: str = None) -> None:
+    '''
+    write {name: [(day, shift), ...]} to the file in one of FORMATS
+
+    yaml, json and jsonl are written one employee at a time, never as one document in memory
+    '''
+    format = format or formatFromFilename(filename)
+    if format == 'binary':
+        writeBinary(schedule, filename)
+        return
+    if format not in FORMATS:
+        raise ValueError(f'invalid output format: {format}')
+    with open(filename, 'w') as file:
+        if format == 'yaml':
+            writeYaml(schedule, file)
+        elif format == 'json':
+            writeJson(schedule, file)
+        else:
+            writeJsonLines(schedule, file)
+
+def writeYaml(schedule: Dict[str, List[Tuple[str, str]]], file: TextIO) -> None:
+    '''
+    write the schedule as plain yaml, e.g.
+
+    BOB:
+    - [MONDAY, MORNING]
+    '''
+    for name, slots in schedule.items():
+        lines = [yamlKey(name), ':\n']
+        for day, shift in slots:
+            lines.append(f'- [{day}, {shift}]\n')
+        if not slots:
+            lines[-1] = ': []\n'
+        file.write(''.join(lines))
+
+def writeJson(schedule: Dict[str, List[Tuple[str, str]]], file: TextIO) -> None:
+    '''
+    write the schedule as a json object of {name: [[day, shift], ...]}
+    '''
+    file.write('{')
+    separator = '\n'
+    for name, slots in schedule.items():
+        file.write(f'{separator}{json.dumps(name)}: {json.dumps(slots)}')
+        separator = ',\n'
+    file.write('\n}\n')
+
+def writeJsonLines(schedule: Dict[str, List[Tuple[str, str]]], file: TextIO) -> None:
+    '''
+    write one {"name": name, "schedule": [[day, shift], ...]} object per line
+    '''
+    for name, slots in schedule.items():
+        file.write(json.dumps({'name': name, 'schedule': slots}))
+        file.write('\n')
+
+def writeBinary(schedule: Dict[str, List[Tuple[str, str]]], filename: str) -> None:
+    '''
+    write the schedule as employee, day and shift columns (see BINARY_HEADER)
+    '''
+    employees = array('I')
+    days = array('B')
+    shifts = array('B')
+    for index, slots in enumerate(schedule.values()):
+        employees.extend([index] * len(slots))
+        days.extend([DAY_CODES[day] for day, _ in slots])
+        shifts.extend([SHIFT_CODES[shift] for _, shift in slots])
+    encoded = [name.encode('utf-8') for name in schedule]
+    lengths = array('I', map(len, encoded))
+    if sys.byteorder == 'big':
+        employees.byteswap()
+        lengths.byteswap()
+    names = b''.join(encoded)
+
+    with open(filename, 'wb') as file:
+        file.write(BINARY_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, len(schedule), len(days), len(names)))
+        employees.tofile(file)
+        days.tofile(file)
+        shifts.tofile(file)
+        lengths.tofile(file)
+        file.write(names)
+
+def yamlKey(name: str) -> str:
+    '''
+    return name as a plain yaml scalar when it reads back as the same string, quoted otherwise
+    '''
+    if PLAIN_NAME.fullmatch(name) and YAML_RESOLVER.resolve(yaml.ScalarNode, name, (True, False)) == 'tag:yaml.org,2002:str':
+        return name
+    return json.dumps(name)
+
+
+class BinarySchedule:
+    '''
+    memory-mapped columns of a schedule written by writeBinary
+
+    employee[i], day[i] and shift[i] describe row i; employee[i] indexes names.
+    use as a context manager or call close() when done
+    '''
+    def __init__(self, filename: str):
+        with open(filename, 'rb') as file:
+            self.buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, numEmployees, numRows, namesLength = BINARY_HEADER.unpack_from(self.buffer)
+        if magic != BINARY_MAGIC or version != BINARY_VERSION:
+            self.buffer.close()
+            raise ValueError(f'{filename} is not a version {BINARY_VERSION} binary schedule')
+
+        view = self.view = memoryview(self.buffer)
+        offset = BINARY_HEADER.size
+        self.employee = view[offset:offset + 4 * numRows].cast('I')
+        offset += 4 * numRows
+        self.day = view[offset:offset + numRows]
+        offset += numRows
+        self.shift = view[offset:offset + numRows]
+        offset += numRows
+        lengths = array('I')
+        lengths.frombytes(view[offset:offset + 4 * numEmployees])
+        offset += 4 * numEmployees
+        if sys.byteorder == 'big':
+            self.employee = array('I', self.employee)
+            self.employee.byteswap()
+            lengths.byteswap()
+        names = bytes(view[offset:offset + namesLength])
+        self.names = []
+        start = 0
+        for length in lengths:
+            self.names.append(names[start:start + length].decode('utf-8'))
+            start += length
+
+    def toSchedule(self) -> Dict[str, List[Tuple[str, str]]]:
+        '''
+        return {name: [(day, shift), ...]} as stored in ManageSchedule.employeeSchedule
+        '''
+        schedule = {name: [] for name in self.names}
+        for employee, day, shift in zip(self.employee, self.day, self.shift):
+            schedule[self.names[employee]].append((DAY_NAMES[day], SHIFT_NAMES[shift]))
+        return schedule
+
+    def close(self) -> None:
+        for column in (self.employee, self.day, self.shift, self.view):
+            if isinstance(column, memoryview):
+                column.release()
+        self.buffer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,143 @@
+'''
+client and load test of schedule_service
+
+    python service_client.py --socket /tmp/schedule.sock --requests 1000 --concurrency 32 --sites 8 --employees 200
+
+the load test sends generated rosters (benchmark.generate) of a few sites from concurrent clients and prints
+the client side throughput and p50/p99 latency next to the stats of the service.
+'''
+from typing import List, Optional
+import argparse
+import asyncio
+import itertools
+import json
+import sys
+import time
+from benchmark.generate import generateRoster
+from schedule_service import DEFAULT_PORT, MAX_REQUEST_BYTES, percentile
+
+
+class ScheduleClient:
+    '''
+    one connection to the service, requests are pipelined and matched to their responses by id
+
+        async with ScheduleClient(path='/tmp/schedule.sock') as client:
+            response = await client.request({'site': 'store 1', 'employees': [...]})
+    '''
+    def __init__(self, path: Optional[str] = None, host: str = '127.0.0.1', port: int = DEFAULT_PORT):
+        self.path = path
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+        self.pending = {} # {id: future of the response}
+        self.ids = itertools.count(1)
+        self.readTask = None
+
+    async def __aenter__(self) -> 'ScheduleClient':
+        if self.path is not None:
+            self.reader, self.writer = await asyncio.open_unix_connection(self.path, limit=MAX_REQUEST_BYTES)
+        else:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port, limit=MAX_REQUEST_BYTES)
+        self.readTask = asyncio.ensure_future(self.readResponses())
+        return self
+
+    async def __aexit__(self, *exception) -> None:
+        self.writer.close()
+        await self.readTask
+
+    async def readResponses(self) -> None:
+        try:
+            while True:
+                line = await self.reader.readline()
+                if not line:
+                    break
+                response = json.loads(line)
+                future = self.pending.pop(response.get('id'), None)
+                if future is not None and not future.done():
+                    future.set_result(response)
+        except ConnectionError:
+            pass
+        finally:
+            for future in self.pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError('connection closed by the service'))
+            self.pending.clear()
+
+    async def request(self, request: dict) -> dict:
+        '''
+        send a request (see schedule_service) and return its response
+        '''
+        requestId = next(self.ids)
+        future = asyncio.get_running_loop().create_future()
+        self.pending[requestId] = future
+        self.writer.write(json.dumps({**request, 'id': requestId}).encode() + b'\n')
+        await self.writer.drain()
+        return await future
+
+    async def stats(self) -> dict:
+        return await self.request({'op': 'stats'})
+
+
+async def loadTest(path: Optional[str] = None, host: str = '127.0.0.1', port: int = DEFAULT_PORT, requests: int = 100,
+                   concurrency: int = 8, sites: int = 4, employees: int = 100, seed: int = 0) -> dict:
+    '''
+    send requests for the generated sites from concurrency clients, return
+    {'requests', 'errors', 'coalesced', 'seconds', 'throughput', 'p50', 'p99', 'service'}
+    '''
+    payloads = [{'site': f'site{index}', 'employees': list(generateRoster(employees, seed=seed + index)), 'seed': seed}
+                for index in range(sites)]
+    latencies = []
+    errors = coalesced = 0
+    counter = itertools.count()
+
+    async def worker() -> None:
+        nonlocal errors, coalesced
+        async with ScheduleClient(path, host, port) as client:
+            for index in counter:
+                if index >= requests:
+                    break
+                start = time.perf_counter()
+                response = await client.request(payloads[index % sites])
+                latencies.append(time.perf_counter() - start)
+                errors += response['error'] is not None
+                coalesced += response['coalesced']
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    seconds = time.perf_counter() - start
+    async with ScheduleClient(path, host, port) as client:
+        service = await client.stats()
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'coalesced': coalesced,
+        'seconds': seconds,
+        'throughput': len(latencies) / seconds if seconds else 0.0,
+        'p50': percentile(latencies, 0.5),
+        'p99': percentile(latencies, 0.99),
+        'service': service,
+    }
+
+def parseArguments(argv: List[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='load test a running schedule service')
+    parser.add_argument('--socket', default=None, help='unix socket path, tcp is used without one')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--requests', type=int, default=100)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--sites', type=int, default=4)
+    parser.add_argument('--employees', type=int, default=100, help='employees per site')
+    parser.add_argument('--seed', type=int, default=0)
+    return parser.parse_args(argv)
+
+def main(argv: List[str] = None) -> int:
+    arguments = parseArguments(argv)
+    result = asyncio.run(loadTest(arguments.socket, arguments.host, arguments.port, arguments.requests,
+                                  arguments.concurrency, arguments.sites, arguments.employees, arguments.seed))
+    print(json.dumps(result, indent=2))
+    return 1 if result['errors'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,24 @@
+from benchmark.generate import generateRoster, writeRoster
+from benchmark.run import PHASES, timePhases
+
+def test_generate_roster_seeded():
+    roster = list(generateRoster(50, seed=3, contention=0.5))
+
+    assert roster == list(generateRoster(50, seed=3, contention=0.5))
+    assert roster != list(generateRoster(50, seed=4, contention=0.5))
+    for employee in roster:
+        days = [slot['day'] for slot in employee['preferences']]
+        assert 1 <= len(days) <= 5
+        assert len(set(days)) == len(days)
+
+def test_generate_roster_contention():
+    slots = [slot for employee in generateRoster(200, seed=0, contention=1.0) for slot in employee['preferences']]
+    assert all(slot['time'] == 'morning' and slot['day'] not in ('Sat', 'Sun') for slot in slots)
+
+def test_time_phases(tmp_path):
+    filename = str(tmp_path / 'roster.yaml')
+    writeRoster(filename, 20, seed=1)
+
+    timings = timePhases(filename)
+    assert tuple(timings) == PHASES
+    assert all(seconds >= 0 for seconds in timings.values())
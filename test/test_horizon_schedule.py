@@ -0,0 +1,57 @@
+import io
+import json
+from datetime import date, timedelta
+from horizon_schedule import HorizonSchedule, writeWeeks
+from schedule_codes import SHIFT_CODES
+
+def check_rules(weeks, start, maxWorkDay, maxWindowDays, windowDays, maxConsecutiveDays, minShiftGap, capacity):
+    worked = {}
+    counts = {}
+    for week in weeks:
+        for name, slots in week['schedule'].items():
+            assert len(slots) <= maxWorkDay
+            for day, shift in slots:
+                index = (date.fromisoformat(day) - start).days
+                worked.setdefault(name, []).append(index * 3 + SHIFT_CODES[shift])
+                counts[(index, shift)] = counts.get((index, shift), 0) + 1
+    assert all(count <= capacity for count in counts.values())
+    for slots in worked.values():
+        slots.sort()
+        days = [slot // 3 for slot in slots]
+        assert len(set(days)) == len(days)
+        assert all(later - earlier >= minShiftGap for earlier, later in zip(slots, slots[1:]))
+        run = 1
+        for earlier, later in zip(days, days[1:]):
+            run = run + 1 if later == earlier + 1 else 1
+            assert run <= maxConsecutiveDays
+        for first in range(days[-1] + 1):
+            assert sum(first <= day < first + windowDays for day in days) <= maxWindowDays
+
+def test_horizon_rules_across_weeks():
+    # everyone prefers the evening before and the morning after the weekend, every day of the week
+    preferences = {f'E{index}': [(day, (index + day) % 3) for day in range(7)] for index in range(6)}
+    start = date(2026, 11, 4)
+    horizon = HorizonSchedule(preferences, start, 9 * 7 + 3, capacity=1, maxWorkDay=5, maxWindowDays=8,
+                              windowDays=14, maxConsecutiveDays=4, minShiftGap=3, seed=0)
+    weeks = list(horizon.iterWeeks())
+
+    assert [week['days'] for week in weeks] == [7] * 9 + [3]
+    assert weeks[1]['start'] == (start + timedelta(days=7)).isoformat()
+    # only the dates needed by the rules are kept per employee
+    assert max(horizon.workedDays).bit_length() <= horizon.memory + 7
+    check_rules(weeks, start, 5, 8, 14, 4, 3, 1)
+
+def test_horizon_preferences_and_stream():
+    preferences = {'BOB': [(0, 0), (2, 2)], 'ALICE': [(0, 0)]}
+    horizon = HorizonSchedule(preferences, date(2026, 11, 2), 14, capacity={'Mon': [1, 0, 0], 'Tue': 0, 'Wed': 1,
+                              'Thu': 0, 'Fri': 0, 'Sat': 0, 'Sun': 0}, seed=0)
+    horizon.setDateCapacity(date(2026, 11, 11), 2, 0)
+    file = io.StringIO()
+    assert writeWeeks(horizon.iterWeeks(), file) == 2
+
+    first, second = map(json.loads, file.getvalue().splitlines())
+    assert first['schedule'] == {'BOB': [['2026-11-02', 'MORNING'], ['2026-11-04', 'EVENING']],
+                                 'ALICE': [['2026-11-04', 'MORNING']]}
+    assert (first['satisfied'], first['preferences'], first['unfilledSlots']) == (2, 3, 1)
+    # the evening of the second wednesday is closed, BOB falls back to its morning
+    assert second['schedule']['BOB'] == [['2026-11-09', 'MORNING'], ['2026-11-11', 'MORNING']]
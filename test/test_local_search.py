@@ -0,0 +1,29 @@
+from local_search import LocalSearch, improveAssignment
+
+def test_improve_assignment_moves_to_preferences():
+    # BOB was bumped to tuesday evening, ALICE holds his preferred monday morning and prefers tuesday evening
+    schedule = {'BOB': [(1, 2)], 'ALICE': [(0, 0)], 'CAROL': [(2, 0), (3, 0), (4, 0), (5, 0)]}
+    preferences = {'BOB': [(0, 0)], 'ALICE': [(1, 2)], 'CAROL': []}
+    improved, trace = improveAssignment(schedule, preferences, maxWorkDay=2, capacity=1, iterations=2000, seed=0)
+
+    assert (0, 0) in improved['BOB']
+    assert (1, 2) in improved['ALICE']
+    # CAROL is over maxWorkDay in the input, her shifts are only handed to the others
+    assert len(improved['CAROL']) < 4
+    assert sum(map(len, improved.values())) == 6
+    assert trace[0][0] == 0 and trace[-1][2] > trace[0][2]
+    assert [score for _, _, score in trace] == sorted(score for _, _, score in trace)
+
+def test_local_search_keeps_constraints_and_best():
+    preferences = {f'E{index}': [((index + day) % 7, index % 3) for day in range(3)] for index in range(12)}
+    search = LocalSearch({}, preferences, maxWorkDay=3, capacity=2, seed=1)
+    trace = search.run(iterations=5000)
+
+    assert search.score == search.computeScore() == trace[-1][2]
+    for held in search.held:
+        assert len(held) <= 3
+        assert len({slot // 3 for slot in held}) == len(held)
+    assert all(len(roster) <= 2 for roster in search.roster)
+    again = LocalSearch({}, preferences, maxWorkDay=3, capacity=2, seed=1)
+    again.run(iterations=5000)
+    assert again.toSchedule() == search.toSchedule()
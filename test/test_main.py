@@ -0,0 +1,50 @@
+import os
+import shutil
+import yaml
+from main import findInputs, runBatch
+
+INPUT = os.path.join(os.path.dirname(__file__), '..', 'input', 'preference_schedule.yaml')
+
+def make_inputs(directory):
+    shutil.copy(INPUT, directory / 'store1.yaml')
+    (directory / 'bad.yaml').write_text('employees:\n  - name: X\n  - [')
+    (directory / 'invalid.yml').write_text('employees:\n  - name: X\n    preferences:\n      - {day: Funday, time: morning}\n')
+    with open(INPUT) as file:
+        employees = yaml.safe_load(file)['employees']
+    with open(directory / 'region.yaml', 'w') as file:
+        yaml.safe_dump({'sites': [{'name': 'north', 'employees': employees}, {'name': 'south', 'employees': employees[:3]}]}, file)
+
+def test_run_batch(tmp_path):
+    make_inputs(tmp_path)
+    inputs = findInputs([str(tmp_path)])
+    results = runBatch(inputs, str(tmp_path / 'out'), workers=2, seed=4)
+
+    assert [result['site'] for result in results] == ['bad', 'invalid', 'north', 'south', 'store1']
+    assert results[0]['error'] is not None
+    assert all(result['error'] is None for result in results[1:])
+
+    # invalid preferences are dropped unless strict
+    strict = runBatch([str(tmp_path / 'invalid.yml')], str(tmp_path / 'strict'), workers=1, strict=True)
+    assert strict[0]['error'].startswith('PreferenceValidationError')
+
+    # a site scheduled in a batch is identical to the same site scheduled alone
+    alone = runBatch([str(tmp_path / 'store1.yaml')], str(tmp_path / 'alone'), workers=1, seed=4)
+    with open(alone[0]['output']) as file:
+        expected = file.read()
+    for result in (results[2], results[4]):
+        with open(result['output']) as file:
+            assert file.read() == expected
+
+def test_run_batch_bad_site_in_the_middle(tmp_path):
+    with open(INPUT) as file:
+        employees = yaml.safe_load(file)['employees']
+    with open(tmp_path / 'region.yaml', 'w') as file:
+        yaml.safe_dump({'sites': [{'name': 'north', 'employees': employees}, {'employees': employees[:2]},
+                                  {'name': 'east', 'employees': employees[:3]}]}, file)
+    (tmp_path / 'broken.yaml').write_text('sites:\n  - name: west\n    employees: []\n  - name: [\n')
+
+    results = runBatch([str(tmp_path / 'region.yaml'), str(tmp_path / 'broken.yaml')], str(tmp_path / 'out'), workers=1)
+
+    assert [(result['site'], result['error'] is None) for result in results] == [
+        ('north', True), ('region.yaml#2', False), ('east', True), ('west', True), ('broken.yaml#2', False)]
+    assert results[0]['output'].endswith('north.yaml') and results[2]['employees'] == 3
@@ -1,6 +1,8 @@
 import pytest
 import os
+import json
 from manage_employee_schedule import ManageSchedule
+from schedule_codes import parseDay, parseShift, parseCapacity
 
 def test_initializeEmployeePerShiftDay():
     schedule = ManageSchedule('schedule')
@@ -58,7 +60,7 @@ def test_update_employee_number_per_day():
 
 def test_get_numof_workday():
     schedule = ManageSchedule('schedule')
-    filepath = os.path.expanduser('~/manage_employee_schedule/input/preference_schedule.yaml')
+    filepath = os.path.join(os.path.dirname(__file__), '..', 'input', 'preference_schedule.yaml')
     schedule.getPreference(filepath)
 
     assert schedule.getNumofWorkPreference('bob') == 5
@@ -67,7 +69,7 @@ def test_get_numof_workday():
 
 def test_is_one_shift_per_day():
     schedule = ManageSchedule('schedule')
-    filepath = os.path.expanduser('~/manage_employee_schedule/input/preference_schedule.yaml')
+    filepath = os.path.join(os.path.dirname(__file__), '..', 'input', 'preference_schedule.yaml')
     schedule.getPreference(filepath)
 
     assert schedule.isOneShiftPerDay('bob') == True
@@ -75,4 +77,236 @@ def test_is_one_shift_per_day():
     assert schedule.isOneShiftPerDay('Alice') == True
 
 
-    
\ No newline at end of file
+def test_parse_day_and_shift():
+    assert parseDay('Mon') == 0
+    assert parseDay('tuesday') == 1
+    assert parseDay('SUN') == 6
+    assert parseShift('Evening') == 2
+
+    with pytest.raises(ValueError):
+        parseDay('someday')
+    with pytest.raises(ValueError):
+        parseShift('night')
+
+def test_capacity_table():
+    weekend = parseCapacity({'Sat': 3, 'Sun': [1, 2, 3], ('Fri', 'evening'): 0, 'Thu morning': 1})
+    assert weekend[0] == (2, 2, 2) and weekend[3] == (1, 2, 2) and weekend[4] == (2, 2, 0)
+    assert weekend[5] == (3, 3, 3) and weekend[6] == (1, 2, 3)
+    with pytest.raises(ValueError):
+        parseCapacity([[2, 2, 2]])
+
+    schedule = ManageSchedule()
+    schedule.getPreference(os.path.join(os.path.dirname(__file__), '..', 'input', 'preference_schedule.yaml'))
+    schedule.assignShift(maxWorkDay=5, seed=0, capacity=weekend)
+    assert all(count <= capacity for counts, capacities in zip(schedule.shiftCounts, weekend)
+               for count, capacity in zip(counts, capacities))
+    assert schedule.getEmployeeNumPerShiftDay('Fri')[2] == 0
+    assert schedule.countUnfilledSlots() == sum(map(sum, weekend)) - sum(map(len, schedule.employeeSchedule.values()))
+
+def test_set_employee_schedule_codes():
+    schedule = ManageSchedule()
+
+    schedule.setEmployeeSchedule('bob', 'Tue', 'evening')
+    schedule.updateEmployeeNumPerShiftDay('Tuesday', 'evening')
+
+    assert schedule.employeeSchedule['BOB'] == [('TUESDAY', 'EVENING')]
+    assert schedule.shiftCounts[1] == [0, 0, 1]
+    assert schedule.employeeNumberPerShiftDay['TUESDAY'] == [0, 0, 1]
+    assert schedule.findNextDays('Sat') == ('SUN', 'MON', 'TUE', 'WED', 'THU', 'FRI')
+
+def test_assign_shift_optimal():
+    schedule = ManageSchedule()
+    schedule.getPreference(os.path.join(os.path.dirname(__file__), '..', 'input', 'preference_schedule.yaml'))
+    schedule.assignShift(maxWorkDay=5, strategy='optimal')
+
+    report = schedule.assignmentReport
+    assert report['satisfied'] >= report['greedySatisfied']
+    assert schedule.countSatisfiedPreferences() >= report['satisfied']
+    for day in schedule.employeeNumberPerShiftDay.values():
+        assert day == [2, 2, 2]
+
+def test_find_open_slot():
+    schedule = ManageSchedule()
+    for name in ('A', 'B'):
+        schedule.setEmployeeSchedule(name, 'Mon', 'morning')
+        schedule.updateEmployeeNumPerShiftDay('Mon', 'morning')
+        schedule.setEmployeeSchedule(name, 'Mon', 'afternoon')
+        schedule.updateEmployeeNumPerShiftDay('Mon', 'afternoon')
+
+    # morning and afternoon are full, evening is still open
+    assert schedule.findAvailableShiftDay('C', 'Mon', 5) == 'evening'
+    assert schedule.findOpenSlot('C', 0) == (0, 2)
+
+    # C already works monday, the next open day is tuesday
+    schedule.setEmployeeSchedule('C', 'Mon', 'evening')
+    schedule.updateEmployeeNumPerShiftDay('Mon', 'evening')
+    assert schedule.findOpenSlot('C', 0) == (1, 0)
+
+    # monday is closed once its evening is full, searching from sunday wraps around past it
+    schedule.setEmployeeSchedule('D', 'Sun', 'morning')
+    schedule.updateEmployeeNumPerShiftDay('Sun', 'morning')
+    schedule.setEmployeeSchedule('E', 'Mon', 'evening')
+    schedule.updateEmployeeNumPerShiftDay('Mon', 'evening')
+    assert schedule.openDays & 1 == 0
+    assert schedule.findOpenSlot('D', 6) == (1, 0)
+    assert schedule.findOpenSlot('F', 6) == (6, 0)
+
+def test_fill_under_staffed_shifts():
+    schedule = ManageSchedule()
+    schedule.getPreference(os.path.join(os.path.dirname(__file__), '..', 'input', 'preference_schedule.yaml'))
+    schedule.assignShift(maxWorkDay=5, seed=7)
+
+    other = ManageSchedule()
+    other.getPreference(os.path.join(os.path.dirname(__file__), '..', 'input', 'preference_schedule.yaml'))
+    other.assignShift(maxWorkDay=5, seed=7)
+    assert schedule.employeeSchedule == other.employeeSchedule
+
+    for name, slots in schedule.employeeSchedule.items():
+        assert len(slots) <= 5
+        assert len(set(day for day, _ in slots)) == len(slots)
+
+def test_fill_under_staffed_shifts_least_loaded():
+    schedule = ManageSchedule()
+    schedule.preferences = {'BUSY': [], 'FREE': []}
+    for day in ('Mon', 'Tue', 'Wed'):
+        schedule.setEmployeeSchedule('BUSY', day, 'morning')
+        schedule.updateEmployeeNumPerShiftDay(day, 'morning')
+
+    schedule.fillUnderStaffedÍhifts(maxWorkDay=4, seed=1)
+
+    assert schedule.getNumberofWorkAssigned('FREE') == 4
+    assert schedule.getNumberofWorkAssigned('BUSY') == 4
+    assert schedule.employeeSchedule['FREE'][0] == ('MONDAY', 'MORNING')
+
+def assert_schedule_consistent(schedule):
+    counts = {day: [0, 0, 0] for day in schedule.employeeNumberPerShiftDay}
+    for name, slots in schedule.employeeSchedule.items():
+        assert len(set(day for day, _ in slots)) == len(slots)
+        for day, shift in slots:
+            counts[day][['MORNING', 'AFTERNOON', 'EVENING'].index(shift)] += 1
+    assert counts == schedule.employeeNumberPerShiftDay
+
+def test_incremental_remove_employee():
+    schedule = ManageSchedule()
+    schedule.addEmployee('Bob', [('Mon', 'morning'), ('Tue', 'morning')])
+    schedule.addEmployee('Sarah', [('Mon', 'morning')])
+    schedule.addEmployee('Alice', [('Mon', 'morning'), ('Wed', 'evening')])
+
+    # monday morning is full, alice falls back to monday afternoon
+    assert schedule.employeeSchedule['ALICE'] == [('MONDAY', 'AFTERNOON'), ('WEDNESDAY', 'EVENING')]
+
+    diff = schedule.removeEmployee('bob')
+    assert sorted(diff['removed']) == [('ALICE', 'MONDAY', 'AFTERNOON'), ('BOB', 'MONDAY', 'MORNING'), ('BOB', 'TUESDAY', 'MORNING')]
+    # the emptied tuesday morning goes to the least loaded employees, monday afternoon has nobody free
+    assert diff['added'] == [('ALICE', 'MONDAY', 'MORNING'), ('SARAH', 'TUESDAY', 'MORNING'), ('ALICE', 'TUESDAY', 'MORNING')]
+    assert 'BOB' not in schedule.employeeSchedule
+    assert_schedule_consistent(schedule)
+
+def test_incremental_update_employee():
+    schedule = ManageSchedule()
+    schedule.getPreference(os.path.join(os.path.dirname(__file__), '..', 'input', 'preference_schedule.yaml'))
+    schedule.assignShift(maxWorkDay=5, seed=3)
+
+    before = set((name, *slot) for name, slots in schedule.employeeSchedule.items() for slot in slots)
+    diff = schedule.updateEmployee('John', [('Mon', 'evening'), ('Tue', 'morning'), ('Sun', 'evening')])
+    after = set((name, *slot) for name, slots in schedule.employeeSchedule.items() for slot in slots)
+
+    assert set(diff['added']) == after - before
+    assert set(diff['removed']) == before - after
+    assert ('JOHN', 'SUNDAY', 'EVENING') in after
+    assert_schedule_consistent(schedule)
+
+    with pytest.raises(ValueError):
+        schedule.addEmployee('john', [])
+
+def test_stats():
+    schedule = ManageSchedule('stats', stats=True)
+    schedule.getPreference(os.path.join(os.path.dirname(__file__), '..', 'input', 'preference_schedule.yaml'))
+    schedule.assignShift(maxWorkDay=5, seed=1)
+
+    counters = schedule.stats.counters
+    preferences = sum(len(codes) for codes in schedule.preferenceCodes.values())
+    assert counters['preferencesHonored'] + counters['sameDayFallbacks'] + counters['nextDayFallbacks'] \
+        + counters['unassignedPreferences'] == preferences
+    assert counters['preferencesHonored'] <= schedule.countSatisfiedPreferences()
+    assert counters['unfilledSlots'] == sum(2 - count for counts in schedule.employeeNumberPerShiftDay.values() for count in counts)
+    assert schedule.stats.seconds['load'] > 0
+    assert json.loads(schedule.stats.toJson()) == schedule.stats.toDict()
+
+    assert ManageSchedule().stats is None
+
+def test_schedule_queries():
+    schedule = ManageSchedule()
+    schedule.addEmployee('Bob', [('Wed', 'evening'), ('Mon', 'morning')])
+    schedule.addEmployee('Sarah', [('Wed', 'evening')])
+
+    assert schedule.getRoster('Wed', 'evening') == ['BOB', 'SARAH']
+    assert schedule.getRoster('Tue', 'morning') == []
+    assert schedule.getEmployeeWeek('bob') == [('MONDAY', 'MORNING'), ('WEDNESDAY', 'EVENING')]
+    assert ('WEDNESDAY', 'EVENING') not in schedule.getOpenSlots()
+    assert len(schedule.getOpenSlots()) == 20
+    assert schedule.getCoverageGaps()[('MONDAY', 'MORNING')] == 1
+    assert schedule.getCoverageGaps()[('SUNDAY', 'EVENING')] == 2
+
+    schedule.removeEmployee('Sarah')
+    assert schedule.getRoster('Wednesday', 'Evening') == ['BOB']
+    assert schedule.getCoverageGaps()[('WEDNESDAY', 'EVENING')] == 1
+
+def test_improve_schedule():
+    schedule = ManageSchedule('schedule', stats=True)
+    schedule.getPreference(os.path.join(os.path.dirname(__file__), '..', 'input', 'preference_schedule.yaml'))
+    schedule.assignShift(seed=0)
+    satisfied = schedule.countSatisfiedPreferences()
+
+    trace = schedule.improveSchedule(iterations=3000, seed=0)
+
+    assert trace[-1][2] >= trace[0][2]
+    assert schedule.countSatisfiedPreferences() >= satisfied
+    for name, week in schedule.employeeSchedule.items():
+        assert len(week) <= 5 and len({day for day, _ in week}) == len(week)
+        for day, shift in week:
+            assert name in schedule.getRoster(day, shift)
+    assert all(count <= 2 for counts in schedule.shiftCounts for count in counts)
+    assert schedule.stats.seconds['improve'] > 0
+
+def test_incremental_edits_keep_coverage():
+    schedule = ManageSchedule()
+    schedule.getPreference(os.path.join(os.path.dirname(__file__), '..', 'input', 'preference_schedule.yaml'))
+    schedule.assignShift(maxWorkDay=5, seed=0)
+
+    # bob leaves 5 shifts, a rerun without him also leaves 2 slots open
+    diff = schedule.removeEmployee('bob')
+    assert schedule.countUnfilledSlots() == 2
+    for name, day, shift in diff['removed']:
+        if (day, shift) in schedule.getCoverageGaps():
+            # nobody below maxWorkDay is free that day
+            assert all(len(week) >= 5 or any(scheduled == day for scheduled, _ in week)
+                       for week in schedule.employeeSchedule.values())
+    assert_schedule_consistent(schedule)
+
+    unfilled = schedule.countUnfilledSlots()
+    schedule.updateEmployee('Olivia', [('Mon', 'evening')])
+    assert schedule.countUnfilledSlots() <= unfilled
+    assert_schedule_consistent(schedule)
+
+def test_incremental_fill_uses_seeded_least_loaded_index():
+    def run(seed):
+        # one morning a day from monday to saturday and the sunday evening, 7 shifts for 9 employees
+        schedule = ManageSchedule(capacity=[[1, 0, 0]] * 6 + [[0, 0, 1]])
+        schedule.loadEmployees({'name': f'E{index}', 'preferences': [{'day': 'Mon', 'time': 'morning'}]}
+                               for index in range(9))
+        schedule.assignShift(maxWorkDay=5, seed=seed)
+        # nobody prefers the sunday evening shift, so removing its holder refills it from the index
+        holder = next(iter(schedule.slotRoster[6][2]))
+        free = {name: schedule.getNumberofWorkAssigned(name) for name in schedule.preferences
+                if name != holder and not schedule.workDays.get(name, 0) >> 6 & 1}
+        diff = schedule.removeEmployee(holder)
+        assert_schedule_consistent(schedule)
+        assert all(schedule.loadIndex[name][0] == schedule.getNumberofWorkAssigned(name) for name in schedule.preferences)
+        return diff['added'], free
+
+    added, free = run(seed=4)
+    assert added == run(seed=4)[0]
+    [(name, day, shift)] = added
+    assert (day, shift) == ('SUNDAY', 'EVENING')
+    assert free[name] == min(free.values()) == 0
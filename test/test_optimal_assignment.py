@@ -0,0 +1,61 @@
+import itertools
+import random
+from optimal_assignment import solveAssignment
+
+def test_solve_assignment_beats_order():
+    # greedy in insertion order gives BOB monday morning and leaves ALICE without her only preference
+    preferences = {
+        'BOB': [(0, 0), (1, 0)],
+        'ALICE': [(0, 0)],
+    }
+    assignment, satisfied = solveAssignment(preferences, maxWorkDay=1, capacity=1)
+
+    assert satisfied == 2
+    assert assignment == {'BOB': [(1, 0)], 'ALICE': [(0, 0)]}
+
+def test_solve_assignment_capacity_and_days():
+    preferences = {name: [(0, 0), (1, 1), (2, 2)] for name in ('A', 'B', 'C')}
+    assignment, satisfied = solveAssignment(preferences, maxWorkDay=2, capacity=2)
+
+    assert satisfied == 6
+    assert all(len(slots) == 2 for slots in assignment.values())
+    for slot in [(0, 0), (1, 1), (2, 2)]:
+        assert sum(slot in slots for slots in assignment.values()) <= 2
+    for slots in assignment.values():
+        assert len(set(day for day, _ in slots)) == len(slots)
+
+def bruteForce(preferences, maxWorkDay, capacity):
+    '''
+    return the best (satisfied preferences, assigned shifts) over every schedule of the first two days
+    '''
+    names = list(preferences)
+    choices = list(itertools.product([None, 0, 1, 2], repeat=2)) # shift or nothing per day
+    best = (0, 0)
+    for combination in itertools.product(choices, repeat=len(names)):
+        counts = [[0] * 3 for _ in range(2)]
+        satisfied = shifts = 0
+        feasible = True
+        for name, chosen in zip(names, combination):
+            slots = [(day, shift) for day, shift in enumerate(chosen) if shift is not None]
+            feasible &= len(slots) <= min(len(preferences[name]), maxWorkDay)
+            for day, shift in slots:
+                counts[day][shift] += 1
+            satisfied += sum(slot in preferences[name] for slot in slots)
+            shifts += len(slots)
+        if feasible and all(counts[day][shift] <= capacity[day][shift] for day in range(2) for shift in range(3)):
+            best = max(best, (satisfied, shifts))
+    return best
+
+def test_solve_assignment_matches_brute_force():
+    rng = random.Random(0)
+    for _ in range(100):
+        slots = [(day, shift) for day in range(2) for shift in range(3)]
+        preferences = {f'E{index}': rng.sample(slots, rng.randint(0, 3)) for index in range(3)}
+        capacity = [[rng.randint(0, 2) for _ in range(3)] for _ in range(2)] + [[0] * 3] * 5
+        maxWorkDay = rng.randint(1, 2)
+        assignment, satisfied = solveAssignment(preferences, maxWorkDay, capacity)
+
+        assert (satisfied, sum(map(len, assignment.values()))) == bruteForce(preferences, maxWorkDay, capacity)
+        assert satisfied == sum(slot in preferences[name] for name, slots in assignment.items() for slot in slots)
+        for day, shift in slots:
+            assert sum((day, shift) in held for held in assignment.values()) <= capacity[day][shift]
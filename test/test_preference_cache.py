@@ -0,0 +1,52 @@
+import os
+import shutil
+from manage_employee_schedule import ManageSchedule
+from preference_cache import PreferenceCache
+
+INPUT = os.path.join(os.path.dirname(__file__), '..', 'input', 'preference_schedule.yaml')
+
+def test_cache_hit_matches_parse(tmp_path, monkeypatch):
+    filepath = tmp_path / 'preference.yaml'
+    shutil.copy(INPUT, filepath)
+    with open(filepath, 'a') as file:
+        file.write('\n  - name: Extra\n    preferences:\n      - {day: Someday, time: morning}\n')
+    cache = PreferenceCache(str(tmp_path / 'cache'))
+
+    parsed = ManageSchedule()
+    parsed.getPreference(str(filepath))
+    miss = ManageSchedule()
+    miss.getPreference(str(filepath), cache)
+    assert len(os.listdir(tmp_path / 'cache')) == 1
+
+    # a hit must not parse the file
+    monkeypatch.setattr('manage_employee_schedule.iterEmployees', None)
+    hit = ManageSchedule()
+    hit.getPreference(str(filepath), cache)
+
+    for schedule in (miss, hit):
+        assert schedule.preferenceCodes == parsed.preferenceCodes
+        assert schedule.preferences == parsed.preferences
+        assert schedule.unknownSlots == parsed.unknownSlots == [('EXTRA', 'Someday', 'morning')]
+
+def test_cache_invalidate_and_evict(tmp_path):
+    cache = PreferenceCache(str(tmp_path / 'cache'))
+    filepath = tmp_path / 'preference.yaml'
+    filepath.write_text('employees:\n  - name: Bob\n    preferences:\n      - {day: Mon, time: morning}\n')
+    ManageSchedule().getPreference(str(filepath), cache)
+
+    filepath.write_text('employees:\n  - name: Bob\n    preferences:\n      - {day: Tue, time: evening}\n')
+    schedule = ManageSchedule()
+    schedule.getPreference(str(filepath), cache)
+    assert schedule.preferenceCodes == {'BOB': [(1, 2)]}
+    assert len(os.listdir(tmp_path / 'cache')) == 2
+
+    newest = cache.path(cache.key(str(filepath)))
+    cache.maxBytes = os.path.getsize(newest)
+    cache.evict()
+    assert os.listdir(tmp_path / 'cache') == [os.path.basename(newest)]
+
+def test_cache_names_with_newlines(tmp_path):
+    cache = PreferenceCache(str(tmp_path / 'cache'))
+    employees = [('ANN\nLEE', [(0, 0), (6, 2)]), ('', []), ('ZOË', [(3, 1)])]
+    cache.store('entry', employees, [('ANN\nLEE', 'Someday', 'morning')])
+    assert cache.load('entry') == (employees, [('ANN\nLEE', 'Someday', 'morning')])
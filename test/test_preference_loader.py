@@ -0,0 +1,36 @@
+import json
+import pytest
+from preference_loader import iterEmployees
+
+def test_iter_yaml(tmp_path):
+    filepath = tmp_path / 'preference.yaml'
+    filepath.write_text(
+        'site: store 1\n'
+        'employees:\n'
+        '  - name: Bob\n'
+        '    preferences:\n'
+        '      - {day: Mon, time: morning}\n'
+        '      - {day: Tuesday, time: Evening}\n'
+        '  - name: Sarah\n'
+        '    preferences: []\n'
+        'notes: [a, b]\n'
+    )
+
+    assert list(iterEmployees(str(filepath))) == [('Bob', [(0, 0), (1, 2)]), ('Sarah', [])]
+
+def test_iter_json_lines(tmp_path):
+    filepath = tmp_path / 'preference.jsonl'
+    lines = [
+        {'name': 'Bob', 'preferences': [{'day': 'sat', 'time': 'afternoon'}]},
+        {'name': 'Alice', 'preferences': [{'day': 'SUNDAY', 'time': 'morning'}]},
+    ]
+    filepath.write_text('\n'.join(json.dumps(line) for line in lines) + '\n\n')
+
+    assert list(iterEmployees(str(filepath))) == [('Bob', [(5, 1)]), ('Alice', [(6, 0)])]
+
+def test_iter_invalid_day(tmp_path):
+    filepath = tmp_path / 'preference.yaml'
+    filepath.write_text('employees:\n  - name: Bob\n    preferences:\n      - {day: Someday, time: morning}\n')
+
+    with pytest.raises(ValueError, match='Bob'):
+        list(iterEmployees(str(filepath)))
@@ -0,0 +1,58 @@
+import pytest
+from manage_employee_schedule import ManageSchedule
+from preference_validation import PreferenceValidationError
+
+ROSTER = '''employees:
+  - name: Bob
+    preferences:
+      - {day: Tue, time: morning}
+      - {day: Tuesday, time: evening}
+      - {day: Wed, time: morning}
+  - name: Sarah
+    preferences:
+      - {day: Mon, time: morning}
+      - {day: Tue, time: morning}
+      - {day: Wed, time: morning}
+  - name: Alice
+    preferences:
+      - {day: Someday, time: morning}
+      - {day: Mon, time: night}
+      - {day: Sun, time: evening}
+  - name: bob
+    preferences: []
+'''
+
+def load(tmp_path):
+    filepath = tmp_path / 'preference.yaml'
+    filepath.write_text(ROSTER)
+    schedule = ManageSchedule()
+    schedule.getPreference(str(filepath))
+    return schedule
+
+def test_validation_report(tmp_path):
+    schedule = load(tmp_path)
+    report = schedule.preferenceReport(maxWorkDay=2)
+
+    assert not report.ok
+    assert report.duplicateDays == [('BOB', 'TUESDAY')]
+    assert report.overMaxWorkDay == [('SARAH', 3)]
+    assert report.unknownSlots == [('ALICE', 'Someday', 'morning'), ('ALICE', 'Mon', 'night')]
+    assert report.duplicateNames == ['BOB']
+    assert schedule.isOneShiftPerDay('bob') == False
+    assert schedule.checkPreferences(maxWorkDay=2) == False
+
+def test_validate_strict(tmp_path):
+    schedule = load(tmp_path)
+
+    with pytest.raises(PreferenceValidationError) as error:
+        schedule.assignShift(maxWorkDay=2, strict=True)
+    assert error.value.report.duplicateNames == ['BOB']
+    assert schedule.employeeSchedule == {}
+
+def test_validate_lenient(tmp_path):
+    schedule = load(tmp_path)
+    schedule.validatePreferences(maxWorkDay=2)
+
+    assert schedule.preferenceCodes == {'BOB': [(1, 0), (2, 0)], 'SARAH': [(0, 0), (1, 0)], 'ALICE': [(6, 2)]}
+    assert schedule.isOneShiftPerDay('bob')
+    assert schedule.preferenceReport(maxWorkDay=2).duplicateDays == []
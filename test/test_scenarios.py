@@ -0,0 +1,25 @@
+import os
+from scenarios import scenarioGrid, loadRoster, evaluateScenarios, formatTable
+
+INPUT = os.path.join(os.path.dirname(__file__), '..', 'input', 'preference_schedule.yaml')
+
+def test_evaluate_scenarios():
+    roster = loadRoster(INPUT)
+    scenarios = scenarioGrid({'base': 2, 'weekend': {'Sat': 3, 'Sun': 3}}, [4, 5])
+    assert [scenario['scenario'] for scenario in scenarios] == ['base/4', 'base/5', 'weekend/4', 'weekend/5']
+
+    rows = evaluateScenarios(roster, scenarios)
+    assert [row['slots'] for row in rows] == [42, 42, 48, 48]
+    for row in rows:
+        assert row['maxLoad'] <= row['maxWorkDay']
+        assert row['assigned'] + row['unfilledSlots'] == row['slots']
+        assert row['satisfied'] <= row['preferences'] - row['droppedPreferences']
+    # the same denominator in every scenario
+    assert len({row['preferences'] for row in rows}) == 1
+    assert rows[0]['droppedPreferences'] > rows[1]['droppedPreferences']
+    # the roster itself stays unassigned
+    assert roster.employeeSchedule == {}
+
+    parallel = evaluateScenarios(roster, scenarios, workers=2)
+    assert [{**row, 'seconds': 0} for row in parallel] == [{**row, 'seconds': 0} for row in rows]
+    assert formatTable(rows).splitlines()[2].split()[0] == 'base/5'
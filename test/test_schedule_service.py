@@ -0,0 +1,92 @@
+import asyncio
+import json
+import multiprocessing
+import os
+import yaml
+from benchmark.generate import generateRoster
+from manage_employee_schedule import ManageSchedule
+from schedule_service import INLINE_REQUEST_BYTES, ScheduleService, percentile, solveRequest
+from service_client import ScheduleClient
+
+INPUT = os.path.join(os.path.dirname(__file__), '..', 'input', 'preference_schedule.yaml')
+
+def test_percentile():
+    assert percentile([], 0.5) is None
+    assert percentile([3.0, 1.0, 2.0], 0.5) == 2.0
+    assert percentile(list(range(1, 101)), 0.99) == 99
+
+def test_service_coalesces_and_reports():
+    with open(INPUT) as file:
+        employees = yaml.safe_load(file)['employees']
+    request = {'site': 'store', 'employees': employees, 'seed': 0}
+
+    async def run():
+        service = ScheduleService(workers=1)
+        await service.start(port=0)
+        try:
+            async with ScheduleClient(port=service.port) as client:
+                first, second, other, bad = await asyncio.gather(
+                    client.request(request), client.request(request), client.request({**request, 'maxWorkDay': 4}),
+                    client.request({'site': 'bad', 'employees': [{'name': 'X'}], 'strategy': 'fastest'}))
+                stats = await client.stats()
+        finally:
+            await service.close()
+        return first, second, other, bad, stats
+
+    first, second, other, bad, stats = asyncio.run(run())
+
+    expected = ManageSchedule()
+    expected.getPreference(INPUT)
+    expected.assignShift(seed=0)
+    assert first['error'] is None and first['coalesced'] is False
+    assert first['schedule'] == {name: [list(slot) for slot in slots] for name, slots in expected.employeeSchedule.items()}
+    assert second['coalesced'] is True and second['schedule'] == first['schedule']
+    assert other['coalesced'] is False and max(map(len, other['schedule'].values())) <= 4
+    assert bad['error'] == 'ValueError: invalid strategy: fastest'
+    assert (stats['requests'], stats['solves'], stats['coalesced'], stats['errors']) == (4, 3, 1, 1)
+    assert 0 < stats['p50'] <= stats['p99']
+
+def test_service_close_cancels_open_connections():
+    async def run():
+        errors = []
+        asyncio.get_running_loop().set_exception_handler(lambda loop, context: errors.append(context))
+        service = ScheduleService(workers=1)
+        await service.start(port=0)
+        reader, writer = await asyncio.open_connection('127.0.0.1', service.port)
+        writer.write(b'{"id": 1, "site": "slow", "employees": [{"name": "A"}], "improveSeconds": 0.5}\n')
+        await writer.drain()
+        await asyncio.sleep(0.1)
+        await service.close()
+        closed = await reader.read()
+        writer.close()
+        return errors, closed, service.connections
+
+    errors, closed, connections = asyncio.run(run())
+    assert errors == [] and closed == b'' and connections == set()
+
+def test_service_warms_workers_and_decodes_long_requests():
+    # the local search keeps the first solve running while the second copy is decoded
+    request = {'site': 'large', 'employees': list(generateRoster(1000, seed=0)), 'seed': 0, 'improveSeconds': 0.5}
+    assert len(json.dumps(request)) > INLINE_REQUEST_BYTES
+
+    async def run():
+        service = ScheduleService(workers=2)
+        await service.start(port=0)
+        # both workers run before the first request
+        workers = len(multiprocessing.active_children())
+        try:
+            async with ScheduleClient(port=service.port) as client:
+                first, second, invalid = await asyncio.gather(
+                    client.request(request), client.request(request), client.request({**request, 'strategy': 'fastest'}))
+        finally:
+            await service.close()
+        return workers, first, second, invalid
+
+    workers, first, second, invalid = asyncio.run(run())
+
+    assert workers == 2
+    # both copies are decoded in parallel, either may start the solve
+    assert first['error'] is None and first['coalesced'] + second['coalesced'] == 1
+    assert first['schedule'] == second['schedule']
+    assert first['satisfied'] >= solveRequest({**request, 'improveSeconds': None})['satisfied']
+    assert invalid['error'] == 'ValueError: invalid strategy: fastest' and invalid['site'] == 'large'
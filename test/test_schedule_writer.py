@@ -0,0 +1,53 @@
+import json
+import pytest
+import yaml
+from schedule_writer import writeSchedule, BinarySchedule
+
+SCHEDULE = {
+    'BOB': [('MONDAY', 'MORNING'), ('TUESDAY', 'EVENING')],
+    'NO': [('SUNDAY', 'AFTERNOON')],
+    'EMPTY': [],
+}
+
+def test_write_yaml_plain(tmp_path):
+    filepath = tmp_path / 'schedule.yaml'
+    writeSchedule(SCHEDULE, str(filepath))
+
+    text = filepath.read_text()
+    assert '!!python' not in text
+    assert yaml.safe_load(text) == {name: [list(slot) for slot in slots] for name, slots in SCHEDULE.items()}
+
+@pytest.mark.parametrize('format', ['json', 'jsonl'])
+def test_write_json(tmp_path, format):
+    filepath = tmp_path / f'schedule.{format}'
+    writeSchedule(SCHEDULE, str(filepath))
+
+    if format == 'json':
+        written = json.loads(filepath.read_text())
+    else:
+        written = {line['name']: line['schedule'] for line in map(json.loads, filepath.read_text().splitlines())}
+    assert written == {name: [list(slot) for slot in slots] for name, slots in SCHEDULE.items()}
+
+def test_write_binary(tmp_path):
+    filepath = tmp_path / 'schedule.out'
+    writeSchedule(SCHEDULE, str(filepath), format='binary')
+
+    with BinarySchedule(str(filepath)) as schedule:
+        assert schedule.names == ['BOB', 'NO', 'EMPTY']
+        assert list(schedule.employee) == [0, 0, 1]
+        assert list(schedule.day) == [0, 1, 6]
+        assert list(schedule.shift) == [0, 2, 1]
+        assert schedule.toSchedule() == SCHEDULE
+
+def test_write_binary_names_with_newlines(tmp_path):
+    filepath = tmp_path / 'schedule.bin'
+    schedule = {'ANN\nLEE': [('MONDAY', 'MORNING')], '': [], 'ZOË': [('SUNDAY', 'EVENING')]}
+    writeSchedule(schedule, str(filepath))
+
+    with BinarySchedule(str(filepath)) as written:
+        assert written.names == ['ANN\nLEE', '', 'ZOË']
+        assert written.toSchedule() == schedule
+
+def test_write_invalid_format(tmp_path):
+    with pytest.raises(ValueError):
+        writeSchedule(SCHEDULE, str(tmp_path / 'schedule.yaml'), format='xml')